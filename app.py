@@ -1,8 +1,18 @@
 import streamlit as st
 import os
+import re
 import base64
+import hmac
 from io import BytesIO
 
+import ativos
+import metricas
+import pacote
+from catalogo import ARQUIVO_PLANTAS, CATEGORIAS_FILTRO, carregar_catalogo
+from busca import IndiceBusca
+from interacoes import CLASSES_FARMACOS, CONDICOES, ROTULO_CLASSE, ROTULO_CONDICAO, MatrizInteracoes
+from fragmentos import CacheFragmentos, VERSAO_TEMPLATES, FONTES_GOOGLE, CABECALHO_HOME_HTML, css_html, render_alertas_html
+
 # --- IMPORTS ---
 try:
     from PIL import Image, ImageEnhance
@@ -17,177 +27,285 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# --- FUNÇÕES DE LAYOUT (BLINDADAS CONTRA ERRO DE INDENTAÇÃO) ---
-def render_details_html(plant):
-    # Usamos concatenação (...) para evitar qualquer erro de identação do Python
-    html = (
-        f'<div class="detail-card">'
-        f'<h1 style="text-align: left; font-size: 3rem !important; color: #1a472a; margin-bottom: 0;">{plant.nome}</h1>'
-        f'<h3 style="font-style: italic; color: #666 !important; margin-top: -5px; margin-bottom: 20px;">{plant.nome_cientifico}</h3>'
-        
-        f'<div style="background-color: rgba(26, 71, 42, 0.05); border-left: 4px solid #1a472a; padding: 15px; border-radius: 4px; margin-bottom: 25px; font-size: 1rem; color: #2c3e50;">'
-        f'{plant.descricao}'
-        f'</div>'
-        
-        f'<h3 style="color: #2d5a3f; margin-bottom: 10px;">⚙️ Mecanismo</h3>'
-        f'<p style="color: #2c3e50; line-height: 1.6;">{plant.mecanismo}</p>'
-        
-        f'<div style="margin-top: 20px; padding: 15px; background-color: #e8f5e9; border-radius: 8px; border: 1px solid #c8e6c9;">'
-        f'<h3 style="margin: 0 0 10px 0; color: #1b5e20;">💊 Dosagem Usual</h3>'
-        f'<p style="margin: 0; font-weight: bold; color: #1b5e20; font-size: 1.1rem;">{plant.dose}</p>'
-        f'</div>'
+# --- MÉTRICAS (opcional, FITO_METRICAS=1) ---
+def contexto_script():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        return get_script_run_ctx()
+    except Exception: return None
 
-        f'<hr style="margin: 30px 0; border-top: 1px solid #ddd;">'
-        
-        f'<h3 style="color: #8B0000 !important; margin-bottom: 20px;">⚠️ Perfil de Segurança</h3>'
-        
-        f'<div style="display: grid; grid-template-columns: 1fr 1fr; gap: 20px;">'
-        f'<div>'
-        f'<strong>Efeitos Adversos:</strong>'
-        f'<p style="font-size: 0.95rem; color: #444;">{plant.adversos}</p>'
-        f'</div>'
-        f'<div>'
-        f'<strong>Contraindicações:</strong>'
-        f'<p style="font-size: 0.95rem; color: #b71c1c;">{plant.contraindicacoes}</p>'
-        f'</div>'
-        f'</div>'
-        
-        f'<div style="margin-top: 20px;">'
-        f'<strong>Interações:</strong>'
-        f'<p style="font-size: 0.95rem; color: #444; font-style: italic;">{plant.interacoes}</p>'
-        f'</div>'
-        f'</div>'
-    )
-    return html
-
-def render_card_html(plant, img_html, bg_badge, color_badge):
-    html = (
-        f'<div class="plant-card-v2 animate-enter">'
-        f'<div class="card-img-wrapper">{img_html}</div>'
-        f'<div class="card-body">'
-        f'<div class="card-title-v2">{plant.nome}</div>'
-        f'<span class="card-scientific">{plant.nome_cientifico}</span>'
-        f'<span class="badge-pill" style="background-color: {bg_badge}; color: {color_badge};">'
-        f'{plant.nivel_evidencia}'
-        f'</span>'
-        f'</div>'
-        f'</div>'
-    )
-    return html
+def id_sessao():
+    ctx = contexto_script()
+    return ctx.session_id if ctx else None
+
+metricas.instalar_contador_mensagens(contexto_script())
+inicio_rerun = metricas.inicio_rerun()
+
+def admin_autorizado():
+    # Painel de debug so com ?admin=<FITO_ADMIN_TOKEN> na URL
+    token = os.environ.get("FITO_ADMIN_TOKEN")
+    if not token: return False
+    return hmac.compare_digest(str(st.query_params.get("admin", "")), token)
 
 # --- CACHING DE IMAGENS ---
-@st.cache_data
-def get_img_as_base64(file_path):
-    if not os.path.exists(file_path): return None
+# LRU limitado por bytes (FITO_CACHE_MB), compartilhado pelas sessoes do processo e invalidado
+# quando o arquivo de origem muda. FITO_CACHE_DIR persiste as entradas para reinicios a quente.
+@st.cache_resource
+def get_cache_ativos():
+    orcamento = int(float(os.environ.get("FITO_CACHE_MB", "64")) * 1024 * 1024)
+    return ativos.CacheAtivos(orcamento, pasta_disco=os.environ.get("FITO_CACHE_DIR") or None, nome="imagens")
+
+def ler_base64(file_path):
     try:
         with open(file_path, "rb") as f:
             data = f.read()
         return base64.b64encode(data).decode()
     except Exception: return None
 
+# Pacote mmap gerado por otimizar.py: um unico arquivo mapeado, paginas compartilhadas entre workers.
+# No modo "estatico" (padrao) so o indice e usado: as URLs saem do sha256 indexado, sem abrir/stat
+# de cada arquivo. No modo "base64" os bytes crus sao compartilhados, mas cada worker ainda guarda
+# as proprias copias codificadas no CacheAtivos (limitadas por FITO_CACHE_MB).
+@st.cache_resource
+def get_pacote_atual():
+    # Um pacote mapeado por processo: reconstruir o pacote fecha o mapeamento anterior
+    return pacote.PacoteAtual(pacote.ARQUIVO_PACOTE)
+
+@st.cache_resource(max_entries=1)
+def get_publicados(mtime):
+    # Uma listagem de static/ por versao do pacote (o build publica antes de empacotar)
+    try:
+        return frozenset(os.listdir(ativos.PASTA_STATIC))
+    except OSError: return frozenset()
+
+def pacote_atual():
+    return get_pacote_atual().obter()
+
+def url_do_pacote(caminho):
+    """URL versionada de `caminho` a partir do indice do pacote, ou None se nao estiver publicado."""
+    pac = pacote_atual()
+    chave = pacote.chave_de(caminho)
+    if pac is None or chave not in pac: return None
+    arquivo, digest = ativos.arquivo_publicado(chave, pac.sha256(chave))
+    return ativos.url_para(arquivo, digest) if arquivo in get_publicados(get_pacote_atual().mtime) else None
+
+def get_img_as_base64(file_path):
+    pac = pacote_atual()
+    chave = pacote.chave_de(file_path)
+    if pac is not None and chave in pac:
+        # Fatia do mmap codificada direto, sem abrir/stat do arquivo individual
+        def codificar():
+            dados = pac.obter(chave)
+            # None: o pacote foi trocado (e fechado) por outra sessao no meio do caminho
+            return base64.b64encode(dados).decode() if dados is not None else None
+        return get_cache_ativos().obter(chave, pac.caminho, codificar, digest=pac.sha256(chave))
+    if not os.path.exists(file_path): return None
+    return get_cache_ativos().obter(file_path, file_path, lambda: ler_base64(file_path))
+
+# --- DERIVADOS MULTI-RESOLUCAO (gerados por otimizar.py) ---
+PASTA_DERIVADOS = ativos.PASTA_DERIVADOS
+
+LARGURA_SLOT = ativos.LARGURA_SLOT
+
+@st.cache_resource(max_entries=1)
+def carregar_manifesto_imagens(mtime):
+    # mtime na chave: manifest.json reconstruido e relido sem reiniciar o servidor;
+    # cache_resource devolve o mesmo dict (somente leitura) sem copia/unpickle a cada chamada
+    return ativos.carregar_manifesto_imagens()
+
+def mtime_manifesto():
+    try:
+        return os.path.getmtime(ativos.ARQUIVO_MANIFESTO)
+    except OSError: return 0
+
+def escolher_variante(plant_id, largura_px):
+    return ativos.escolher_variante(carregar_manifesto_imagens(mtime_manifesto()), plant_id, largura_px)
+
+# --- MODO DE ATIVOS ---
+# "estatico": URLs versionadas por hash em app/static (o navegador baixa uma vez e reutiliza);
+# "base64": data URIs embutidas no markdown (fallback quando o static serving esta desligado).
+def static_serving_habilitado():
+    try:
+        return bool(st.get_option("server.enableStaticServing"))
+    except Exception: return False
+
+MODO_ATIVOS = os.environ.get("FITO_ATIVOS") or ("estatico" if static_serving_habilitado() else "base64")
+
+@st.cache_resource
+def publicar_ativo(caminho, mtime):
+    # mtime faz parte da chave: arquivo alterado => nova publicacao/novo hash
+    try:
+        return ativos.publicar_arquivo(caminho)
+    except Exception:
+        # Sistema de arquivos somente leitura: usa o que o build ja publicou
+        return ativos.carregar_mapa().get(caminho)
+
+def ref_imagem(caminho, mime):
+    """URL estatica (str) ou, no modo base64, (caminho, mime) para virar data URI a cada uso."""
+    if MODO_ATIVOS == "estatico":
+        url = url_do_pacote(caminho)
+        if url: return url
+        # Fora do pacote (arvore sem build): publica o arquivo individualmente
+        if os.path.exists(caminho):
+            url = publicar_ativo(caminho, os.path.getmtime(caminho))
+            if url: return url
+    pac = pacote_atual()
+    if (pac is not None and pacote.chave_de(caminho) in pac) or os.path.exists(caminho):
+        return (caminho, mime)
+    return None
+
+def data_uri(ref):
+    caminho, mime = ref
+    img_b64 = get_img_as_base64(caminho)
+    return f"data:{mime};base64,{img_b64}" if img_b64 else None
+
+def url_imagem(caminho, mime):
+    ref = ref_imagem(caminho, mime)
+    return ref if ref is None or isinstance(ref, str) else data_uri(ref)
+
+def fontes_planta(plant_id, slot, densidades=(1,)):
+    """[(ref, densidade)] do menor derivado que cabe no slot em cada densidade de tela (srcset)."""
+    largura = LARGURA_SLOT[slot]
+    fontes = []
+    for densidade in densidades:
+        escolhido = escolher_variante(plant_id, largura * densidade)
+        ref = ref_imagem(*escolhido) if escolhido else None
+        if ref and ref not in (r for r, _ in fontes): fontes.append((ref, densidade))
+    if not fontes:
+        # Sem manifesto: usa o JPG mestre como antes
+        ref = ref_imagem(f"imagens_plantas/{plant_id}.jpg", "image/jpeg")
+        if ref: fontes = [(ref, 1)]
+    return fontes
+
 # --- BACKGROUND PROCESSADO ---
-@st.cache_data
-def get_processed_background():
+def encontrar_fundo():
     possible_files = ["fundo.png", "Gemini_Generated_Image_ynyy07ynyy07ynyy.png"]
-    img_path = next((f for f in possible_files if os.path.exists(f)), None)
+    return next((f for f in possible_files if os.path.exists(f)), None)
+
+def get_processed_background_bytes(img_path):
     if not img_path or Image is None: return None
     try:
-        img = Image.open(img_path).convert("RGBA")
-        enhancer = ImageEnhance.Brightness(img)
-        img = enhancer.enhance(1.15)
-        buffered = BytesIO()
-        img = img.convert('RGB')
-        img.save(buffered, format="JPEG", quality=70)
-        return base64.b64encode(buffered.getvalue()).decode()
+        with metricas.medir("fundo_processado_segundos"):
+            img = Image.open(img_path).convert("RGBA")
+            enhancer = ImageEnhance.Brightness(img)
+            img = enhancer.enhance(1.15)
+            buffered = BytesIO()
+            img = img.convert('RGB')
+            img.save(buffered, format="JPEG", quality=70)
+            return buffered.getvalue()
     except Exception: return None
 
-bg_b64 = get_processed_background()
+def get_processed_background():
+    img_path = encontrar_fundo()
+    if not img_path or Image is None: return None
+    def produzir():
+        data = get_processed_background_bytes(img_path)
+        return base64.b64encode(data).decode() if data else None
+    return get_cache_ativos().obter("fundo_processado", img_path, produzir)
+
+@st.cache_resource
+def get_background_url():
+    # Fundo ja processado pelo build: nenhuma chamada ao PIL na partida do container
+    if os.path.exists(ativos.ARQUIVO_FUNDO):
+        url = url_imagem(ativos.ARQUIVO_FUNDO.replace(os.sep, "/"), "image/jpeg")
+        if url: return url
+    if MODO_ATIVOS == "estatico":
+        data = get_processed_background_bytes(encontrar_fundo())
+        if data:
+            try:
+                return ativos.publicar_bytes("fundo.jpg", data)
+            except Exception: pass
+    bg_b64 = get_processed_background()
+    return f"data:image/jpeg;base64,{bg_b64}" if bg_b64 else None
+
+bg_url = get_background_url()
 
 # --- FUNÇÃO LOGO ---
+@st.cache_resource
 def get_logo_html(image_path, link_url):
-    if os.path.exists(image_path):
-        with open(image_path, "rb") as f:
-            data = f.read()
-            encoded = base64.b64encode(data).decode()
-        return f'<a href="{link_url}" target="_blank"><img src="data:image/png;base64,{encoded}" class="sidebar-logo"></a>'
+    url = url_imagem(image_path, "image/png")
+    if url:
+        return f'<a href="{link_url}" target="_blank"><img src="{url}" class="sidebar-logo"></a>'
     return ""
 
+# --- FONTES ---
+@st.cache_resource
+def get_fontes_css():
+    """@font-face auto-hospedado (gerado por otimizar.py); sem ele, cai no @import do Google Fonts."""
+    if not os.path.exists(ativos.ARQUIVO_FONTES_CSS): return FONTES_GOOGLE
+    try:
+        with open(ativos.ARQUIVO_FONTES_CSS, encoding="utf-8") as f:
+            css = f.read()
+        def trocar(m):
+            url = url_imagem(f"{ativos.PASTA_FONTES}/{m.group(1)}".replace(os.sep, "/"), "font/woff2")
+            if not url: raise FileNotFoundError(m.group(1))
+            return f"url({url})"
+        return re.sub(r"url\(([^)/:]+\.woff2)\)", trocar, css)
+    except Exception: return FONTES_GOOGLE
+
+fontes_css = get_fontes_css()
+
 # --- CSS AVANÇADO ---
-css_background = f"""
-    .stApp {{
-        background-image: url("data:image/jpeg;base64,{bg_b64}");
-        background-size: cover;
-        background-position: center;
-        background-attachment: fixed;
-    }}
-""" if bg_b64 else """ .stApp { background-color: #F7F5EB; } """
-
-st.markdown(f"""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Cinzel:wght@400;700&family=Fauna+One&display=swap');
-    {css_background}
-    .block-container {{ padding-top: 2rem; padding-bottom: 5rem; }}
-    .header-overlay {{ background-color: rgba(255, 255, 255, 0.95); padding: 30px; border-radius: 15px; box-shadow: 0 4px 20px rgba(0,0,0,0.15); backdrop-filter: blur(5px); margin-bottom: 30px; text-align: center; border: 1px solid rgba(255,255,255,0.5); }}
-    h1 {{ font-family: 'Cinzel', serif !important; color: #1a472a !important; font-size: 3.5rem !important; margin-bottom: 5px !important; text-shadow: none !important; }}
-    h2, h3 {{ font-family: 'Cinzel', serif !important; color: #2d5a3f !important; }}
-    p, li, span, div, a {{ font-family: 'Fauna One', serif; color: #2c3e50; }}
-    section[data-testid="stSidebar"] {{ background-color: rgba(255, 253, 245, 0.96); border-right: 1px solid #dcdcdc; }}
-    .sidebar-logo {{ display: block; margin: 0 auto 20px auto; width: 90%; transition: transform 0.2s; }}
-    .sidebar-logo:hover {{ transform: scale(1.05); cursor: pointer; }}
-    .plant-card-v2 {{ background-color: rgba(255, 255, 255, 0.95); border: 1px solid #dcdcdc; border-radius: 8px 25px 8px 25px; padding: 0; box-shadow: 2px 2px 10px rgba(0,0,0,0.05); transition: transform 0.2s ease; height: 100%; overflow: hidden; }}
-    .plant-card-v2:hover {{ transform: translateY(-5px); box-shadow: 0 8px 20px rgba(27, 77, 62, 0.2); border-color: #4CAF50; }}
-    .card-img-wrapper {{ height: 180px; overflow: hidden; border-bottom: 3px solid #1a472a; background-color: #f4f4f4; }}
-    .card-img-v2 {{ width: 100%; height: 100%; object-fit: cover; }}
-    .card-body {{ padding: 15px; text-align: center; }}
-    .badge-pill {{ display: inline-block; padding: 6px 14px; border-radius: 50px; font-size: 0.75rem; font-weight: bold; text-transform: uppercase; letter-spacing: 1px; color: #FFFFFF !important; background-color: #2e7d32 !important; box-shadow: 0 2px 4px rgba(0,0,0,0.2); }}
-    div.stButton > button {{ background-color: #1a472a !important; color: #FFFFFF !important; border-radius: 30px; border: 2px solid #1a472a; padding: 8px 20px; font-family: 'Cinzel', serif; font-weight: bold; transition: all 0.2s; width: 100%; }}
-    div.stButton > button:hover {{ background-color: #2d5a3f !important; color: #FFFFFF !important; border-color: #2d5a3f; transform: scale(1.02); }}
-    div.stButton > button p {{ color: #FFFFFF !important; }}
-    .detail-card {{ background-color: rgba(255, 255, 255, 0.95); padding: 40px; border-radius: 15px; box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1); backdrop-filter: blur(8px); border: 1px solid rgba(255, 255, 255, 0.5); margin-bottom: 20px; height: 100%; color: #2c3e50; }}
-    .taped-photo {{ background: white; padding: 10px 10px 40px 10px; box-shadow: 2px 2px 10px rgba(0,0,0,0.2); transform: rotate(-1.5deg); margin-bottom: 20px; border: 1px solid #ddd; }}
-    #MainMenu {{visibility: hidden;}} footer {{visibility: hidden;}}
-    </style>
-""", unsafe_allow_html=True)
+@st.cache_resource
+def get_css_html(bg_url, fontes_css):
+    # Montado uma vez por processo; com os fragmentos abaixo so e reenviado em reruns completos
+    return css_html(bg_url, fontes_css)
 
-# --- CLASSE DE DADOS ---
-class Planta:
-    def __init__(self, id_planta, nome, nome_cientifico, categoria, descricao, mecanismo, dose, interacoes, adversos, contraindicacoes, nivel_evidencia):
-        self.id = id_planta
-        self.nome = nome
-        self.nome_cientifico = nome_cientifico
-        self.categoria = categoria
-        self.descricao = descricao
-        self.mecanismo = mecanismo
-        self.dose = dose
-        self.interacoes = interacoes
-        self.adversos = adversos
-        self.contraindicacoes = contraindicacoes
-        self.nivel_evidencia = nivel_evidencia
+st.markdown(get_css_html(bg_url, fontes_css), unsafe_allow_html=True)
 
 # --- BANCO DE DADOS ---
-PLANTAS = [
-    Planta("tribulus", "Tribulus", "Tribulus terrestris L.", "Hormonal", "Espécie rica em saponinas esteroidais.", "Aumento de LH, testosterona e DHEA. Estímulo de NO.", "250 mg, 3x ao dia (45% saponinas).", "Potencializa hormonais e TRH.", "Refluxo, náusea.", "Grávidas, HPB sem controle.", "Moderado"),
-    Planta("maca", "Maca Peruana", "Lepidium meyenii Walp.", "Adaptógeno", "Raiz andina nutritiva e tônica.", "Modulação seminal e antioxidante. Inibição da FAAH.", "1,5 a 3 g/dia.", "Interfere em exames hormonais.", "Desconforto digestivo.", "Câncer hormônio-dependente.", "Alto"),
-    Planta("ashwagandha", "Ashwagandha", "Withania somnifera", "Adaptógeno / Força", "Ginseng Indiano. Redução de cortisol.", "GABA-mimético, reduz cortisol, aumenta ATP.", "300-600 mg/dia.", "Potencializa sedativos.", "Sonolência, risco tireoidiano.", "Gravidez, doenças autoimunes.", "Alto"),
-    Planta("mucuna", "Mucuna", "Mucuna pruriens", "Neuromodulador", "Fonte natural de L-DOPA.", "Aumenta dopamina, reduzindo prolactina.", "400 mg (20% L-DOPA).", "Contraindicado com IMAOs.", "Náusea, discinesia.", "Esquizofrenia, gravidez.", "Moderado"),
-    Planta("longjack", "Long Jack", "Eurycoma longifolia", "Hormonal", "Tongkat Ali. Libera testosterona ligada.", "Reduz SHBG e conversão em estrogênio.", "400 mg/dia (euricomanona).", "Reduz absorção de propranolol.", "Raro risco hepático.", "Câncer de próstata.", "Moderado"),
-    Planta("serenoa", "Saw Palmetto", "Serenoa repens", "Próstata", "Palmeira anã. Padrão ouro para próstata.", "Inibe 5-alfa-redutase (Testo -> DHT).", "320 mg/dia.", "Risco sangramento.", "Náusea, cefaleia.", "Mulheres em idade fértil.", "Alto"),
-    Planta("ajuga", "Turkesterone", "Ajuga turkestanica", "Anabólico Natural", "Rica em ecdisteroides.", "Síntese proteica via receptor ERβ.", "500-2000 mg/dia.", "Sinergia com anabolizantes.", "Segurança alta em estudos curtos.", "Hipersensibilidade.", "Baixo"),
-    Planta("prunus", "Pygeum", "Prunus africana", "Próstata", "Cerejeira africana. Anti-inflamatório.", "Inibe proliferação de fibroblastos.", "100-200 mg/dia.", "Seguro.", "Desconforto gástrico raro.", "Crianças.", "Alto"),
-    Planta("urtica", "Urtiga", "Urtica dioica", "Próstata / SHBG", "Raiz de urtiga. 'Destrava' a testosterona.", "Liga-se à SHBG.", "300-600 mg/dia.", "Potencializa diuréticos.", "Leve desconforto GI.", "Insuficiência renal/cardíaca.", "Moderado"),
-    Planta("feno", "Feno-Grego", "Trigonella foenum-graecum", "Metabólico", "Sementes para libido e glicemia.", "Inibição parcial aromatase. Sensibiliza LH.", "500-600 mg/dia.", "Potencializa insulina.", "Odor corporal característico.", "Gravidez.", "Alto"),
-    Planta("tetradium", "Evodia", "Tetradium ruticarpum", "Metabólico", "Wu Zhu Yu. Termogênico.", "Agonista vanilóide.", "5-30 mg/dia (evodiamina).", "Inibe enzimas hepáticas CYP.", "Falta de dados.", "Não recomendado.", "Baixo"),
-    Planta("cyanotis", "Cyanotis", "Cyanotis vaga", "Anabólico Natural", "Fonte de Beta-Ecdisterona.", "Similar ao Turkesterone.", "Dose não estabelecida.", "Desconhecidas.", "Falta de estudos.", "Não recomendado.", "Muito Baixo"),
-    Planta("kaempferia", "Gengibre Preto", "Kaempferia parviflora", "Vigor", "Ginseng Tailandês. Vasodilatador.", "Inibe PDE5, aumenta NO.", "180-360 mg/dia.", "Cuidado com hipotensores.", "Bem tolerado.", "Crianças.", "Baixo"),
-    Planta("bulbine", "Bulbine", "Bulbine latifolia", "Hormonal (Exp)", "Planta africana potente mas arriscada.", "Aumento agudo de testosterona.", "Não segura.", "Altera enzimas renais.", "Hepatotóxico.", "Contraindicado.", "Risco")
-]
+# Monografias em dados/plantas.json, carregadas uma vez por processo (compartilhadas entre sessoes).
+# max_entries=1: so a versao atual fica em memoria; editar o JSON descarta a anterior
+@st.cache_resource(max_entries=1)
+def get_catalogo(mtime):
+    # mtime na chave: editar o JSON invalida o cache sem reiniciar o servidor
+    return carregar_catalogo(ARQUIVO_PLANTAS)
+
+@st.cache_resource(max_entries=1)
+def get_indice_busca(mtime):
+    # Indice invertido/trigramas de todos os campos, montado uma vez por versao do catalogo
+    return IndiceBusca(get_catalogo(mtime))
+
+@st.cache_resource(max_entries=1)
+def get_matriz_interacoes(mtime):
+    # Tags de interacao/contraindicacao e matriz de pares, normalizadas uma vez por versao do catalogo
+    return MatrizInteracoes(get_catalogo(mtime))
+
+def versao_ativos():
+    caminhos = [ativos.ARQUIVO_MANIFESTO, ativos.ARQUIVO_MAPA]
+    return (MODO_ATIVOS,) + tuple(os.path.getmtime(c) if os.path.exists(c) else 0 for c in caminhos)
+
+@st.cache_resource(max_entries=1)
+def get_fragmentos(mtime, versao_ativos, versao_templates):
+    # HTML pronto por planta; qualquer mudanca de dados, imagens ou templates gera uma nova chave
+    return CacheFragmentos(
+        get_catalogo(mtime),
+        fontes_card=lambda plant_id: fontes_planta(plant_id, "card"),
+        fontes_detalhe=lambda plant_id: fontes_planta(plant_id, "detalhe", densidades=(1, 2)),
+        resolver=data_uri,
+    )
+
+CATALOGO = get_catalogo(os.path.getmtime(ARQUIVO_PLANTAS))
+INDICE_BUSCA = get_indice_busca(os.path.getmtime(ARQUIVO_PLANTAS))
+MATRIZ_INTERACOES = get_matriz_interacoes(os.path.getmtime(ARQUIVO_PLANTAS))
+FRAGMENTOS = get_fragmentos(os.path.getmtime(ARQUIVO_PLANTAS), versao_ativos(), VERSAO_TEMPLATES)
+PLANTAS = CATALOGO.plantas
 
 def change_view(view, plant_id=None):
     st.session_state['view'] = view
     st.session_state['selected_plant_id'] = plant_id
 
+# --- PAGINAÇÃO DO GRID ---
+CARDS_POR_PAGINA = int(os.environ.get("FITO_CARDS_POR_PAGINA", "24"))
+COLUNAS_GRID = 4
+
+def carregar_mais():
+    st.session_state['cards_visiveis'] += CARDS_POR_PAGINA
+
 if 'view' not in st.session_state: st.session_state['view'] = 'home'
 if 'selected_plant_id' not in st.session_state: st.session_state['selected_plant_id'] = None
+if 'cards_visiveis' not in st.session_state: st.session_state['cards_visiveis'] = CARDS_POR_PAGINA
+if 'consulta_grid' not in st.session_state: st.session_state['consulta_grid'] = ("", "Todas")
 
 # --- SIDEBAR ---
 with st.sidebar:
@@ -233,80 +351,124 @@ with st.sidebar:
 """, unsafe_allow_html=True)
     st.caption("Copyright © 2025 Thiago Abranches.\nTodos os direitos reservados.")
 
+# --- MÉTRICAS (ADMIN) ---
+# Desenhado dentro do painel principal (fragmento): na sidebar ficaria parado nos reruns parciais
+def render_metricas_admin():
+    if not (metricas.HABILITADO and admin_autorizado()): return
+    with st.expander("🛠️ Métricas (admin)", expanded=False):
+        st.metric("Sessões ativas (5 min)", metricas.sessoes_ativas())
+        st.json(metricas.instantaneo(), expanded=False)
+        st.caption("Cache de imagens")
+        st.json(get_cache_ativos().estatisticas(), expanded=False)
+        st.download_button("Exportar (Prometheus)", metricas.texto_prometheus(), file_name="fito_metricas.prom", mime="text/plain")
+
 # --- HOME VIEW ---
-if st.session_state['view'] == 'home':
-    st.markdown("""
-<div class="header-overlay animate-enter">
-<h1 style="color: #1a472a; font-size: 4rem;">HERBARIO DIGITAL</h1>
-<p style="font-size: 1.2rem; color: #1a472a; font-style: italic; margin-top: -10px;">
-Guia de Plantas Medicinais e Desempenho Físico
-</p>
-<div style="width: 100px; height: 3px; background: #1a472a; margin: 20px auto;"></div>
-</div>
-""", unsafe_allow_html=True)
+def render_home():
+    st.markdown(CABECALHO_HOME_HTML, unsafe_allow_html=True)
+    st.button("🩺 Triagem de Interações", key="abrir_triagem", on_click=change_view, args=('triagem',))
+
+    # O Streamlit descarta o estado dos widgets que o detalhe esconde: restaura busca/categoria de consulta_grid
+    busca_salva, categoria_salva = st.session_state['consulta_grid']
+    if 'campo_busca' not in st.session_state: st.session_state['campo_busca'] = busca_salva
+    if 'campo_categoria' not in st.session_state: st.session_state['campo_categoria'] = categoria_salva
 
     col_search, col_filter = st.columns([3, 1])
     with col_search:
-        search = st.text_input("🔍 Pesquisar", placeholder="Nome da planta...", label_visibility="collapsed")
+        search = st.text_input("🔍 Pesquisar", placeholder="Nome, mecanismo, interação...", label_visibility="collapsed", key="campo_busca")
     with col_filter:
-        cat_filter = st.selectbox("Categoria", ["Todas", "Hormonal", "Adaptógeno", "Próstata", "Anabólico Natural", "Metabólico"], label_visibility="collapsed")
+        cat_filter = st.selectbox("Categoria", CATEGORIAS_FILTRO, label_visibility="collapsed", key="campo_categoria")
+
+    with metricas.medir("filtro_busca_segundos"):
+        filtered = CATALOGO.filtrar(categoria=None if cat_filter == "Todas" else cat_filter)
+        if search:
+            # Ordem de relevancia da busca, restrita a categoria escolhida
+            permitidos = None if cat_filter == "Todas" else {p.id for p in filtered}
+            filtered = [p for p in INDICE_BUSCA.buscar(search) if permitidos is None or p.id in permitidos]
 
-    filtered = PLANTAS
-    if cat_filter != "Todas": filtered = [p for p in filtered if cat_filter in p.categoria]
-    if search: filtered = [p for p in filtered if search.lower() in p.nome.lower() or search.lower() in p.descricao.lower()]
+    # Nova busca/filtro volta para a primeira pagina; voltar do detalhe mantem a posicao
+    if st.session_state['consulta_grid'] != (search, cat_filter):
+        st.session_state['consulta_grid'] = (search, cat_filter)
+        st.session_state['cards_visiveis'] = CARDS_POR_PAGINA
+    visiveis = filtered[:st.session_state['cards_visiveis']]
 
-    cols = st.columns(4)
-    for idx, plant in enumerate(filtered):
-        col = cols[idx % 4]
+    cols = st.columns(COLUNAS_GRID)
+    for idx, plant in enumerate(visiveis):
+        col = cols[idx % COLUNAS_GRID]
         with col:
-            img_path = f"imagens_plantas/{plant.id}.jpg"
-            img_b64 = get_img_as_base64(img_path)
-            img_html = f'<img src="data:image/jpeg;base64,{img_b64}" class="card-img-v2">' if img_b64 else '<div style="height:100%; background:#f0f4f1; display:flex; align-items:center; justify-content:center; color:#8ba896;">🌿</div>'
-            
-            # Renderiza card com função segura
-            st.markdown(render_card_html(plant, img_html, "#2D6A4F", "#FFFFFF"), unsafe_allow_html=True)
+            # Card pronto do cache de fragmentos
+            with metricas.medir("render_card_segundos"):
+                # Primeira linha (acima da dobra) sem lazy-load
+                card_html = FRAGMENTOS.card(plant.id, lazy=idx >= COLUNAS_GRID)
+            st.markdown(card_html, unsafe_allow_html=True)
             
-            if st.button(f"Ver Detalhes", key=f"btn_{plant.id}"):
-                change_view('detail', plant.id)
-                st.rerun()
+            st.button(f"Ver Detalhes", key=f"btn_{plant.id}", on_click=change_view, args=('detail', plant.id))
             st.markdown("<br>", unsafe_allow_html=True)
 
+    if len(filtered) > len(visiveis):
+        st.caption(f"Mostrando {len(visiveis)} de {len(filtered)} plantas")
+        st.button("Carregar mais", key="btn_carregar_mais", on_click=carregar_mais)
+
 # --- DETAIL VIEW ---
-elif st.session_state['view'] == 'detail':
-    plant = next((p for p in PLANTAS if p.id == st.session_state['selected_plant_id']), None)
+def render_detail():
+    plant = CATALOGO.get(st.session_state['selected_plant_id'])
     if plant:
-        if st.button("← Voltar ao Herbário", key="back_btn"):
-            change_view('home')
-            st.rerun()
+        st.button("← Voltar ao Herbário", key="back_btn", on_click=change_view, args=('home',))
 
         c1, c2 = st.columns([1, 2])
         
+        with metricas.medir("render_detalhe_segundos"):
+            esquerda_html, monografia_html = FRAGMENTOS.detalhe(plant.id)
         with c1:
-            img_path = f"imagens_plantas/{plant.id}.jpg"
-            img_b64 = get_img_as_base64(img_path)
-            
-            if img_b64:
-                st.markdown(f"""
-<div class="taped-photo">
-<img src="data:image/jpeg;base64,{img_b64}" style="width: 100%;">
-<div style="text-align:center; font-family:'Courier New'; font-size:0.8em; margin-top:5px; color:#555;">Fig. 1: {plant.nome}</div>
-</div>
-""", unsafe_allow_html=True)
-            else:
-                st.markdown("""
-<div class="taped-photo" style="height:300px; display:flex; align-items:center; justify-content:center; background:#f9f9f9; color:#ccc;">
-<span>Imagem não carregada</span>
-</div>
-""", unsafe_allow_html=True)
-            
-            st.markdown(f"""
-<div class="detail-card">
-<h3 style="margin-top:0;">🏷️ Categoria</h3><p>{plant.categoria}</p>
-<hr style="margin: 15px 0;">
-<h3>🧪 Evidência</h3><p>{'Nível Alto: Estudos Clínicos Robustos' if plant.nivel_evidencia == 'Alto' else 'Atenção: Risco Elevado' if 'Risco' in plant.nivel_evidencia else f'Nível: {plant.nivel_evidencia}'}</p>
+            st.markdown(esquerda_html, unsafe_allow_html=True)
+
+        with c2:
+            st.markdown(monografia_html, unsafe_allow_html=True)
+
+# --- TRIAGEM DE INTERAÇÕES ---
+def render_triagem():
+    st.button("← Voltar ao Herbário", key="back_btn_triagem", on_click=change_view, args=('home',))
+    st.markdown("""
+<div class="header-overlay">
+<h2 style="margin: 0;">Triagem de Interações e Contraindicações</h2>
+<p style="font-style: italic; margin: 5px 0 0 0;">Escolha as plantas da prescrição e, se quiser, os fármacos em uso e as condições do paciente.</p>
 </div>
 """, unsafe_allow_html=True)
 
-        with c2:
-            # Usa a função blindada render_details_html
-            st.markdown(render_details_html(plant), unsafe_allow_html=True)
\ No newline at end of file
+    nomes = {p.id: p.nome for p in PLANTAS}
+    ids = st.multiselect("🌿 Plantas", list(nomes), format_func=nomes.get, key="triagem_plantas")
+    col_farmacos, col_condicoes = st.columns(2)
+    with col_farmacos:
+        classes = st.multiselect("💊 Fármacos em uso", [c[0] for c in CLASSES_FARMACOS], format_func=ROTULO_CLASSE.get, key="triagem_classes")
+    with col_condicoes:
+        condicoes = st.multiselect("🧑‍⚕️ Condições do paciente", [c[0] for c in CONDICOES], format_func=ROTULO_CONDICAO.get, key="triagem_condicoes")
+
+    if not ids:
+        st.info("Selecione ao menos uma planta.")
+        return
+    with metricas.medir("triagem_segundos"):
+        alertas = MATRIZ_INTERACOES.triagem(ids, classes, condicoes)
+    if not alertas:
+        st.success("Nenhum alerta encontrado nas monografias para esta combinação.")
+    else:
+        st.markdown(render_alertas_html(alertas), unsafe_allow_html=True)
+    st.caption("Alertas derivados do texto das monografias (interações e contraindicações); não substituem a avaliação clínica.")
+
+# --- PAINEL PRINCIPAL (RERUN PARCIAL) ---
+# Com st.fragment (Streamlit >= 1.37), buscar, filtrar, abrir e fechar uma planta reexecutam
+# so este painel; page config, CSS, sidebar e logo ficam como foram emitidos no inicio da sessao.
+fragmento = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda f: f)
+
+@fragmento
+def painel_principal():
+    inicio = metricas.inicio_rerun()
+    if st.session_state['view'] == 'home':
+        render_home()
+    elif st.session_state['view'] == 'detail':
+        render_detail()
+    elif st.session_state['view'] == 'triagem':
+        render_triagem()
+    render_metricas_admin()
+    metricas.fim_rerun(inicio, id_sessao(), escopo="painel", view=st.session_state['view'])
+
+painel_principal()
+metricas.fim_rerun(inicio_rerun, id_sessao(), escopo="app", view=st.session_state['view'])
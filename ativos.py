@@ -0,0 +1,294 @@
+import os
+import sys
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+
+import metricas
+
+# Forcar encoding UTF-8 para evitar erros no Windows
+if sys.platform == "win32":
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except AttributeError:
+        pass
+
+# Pasta servida pelo Streamlit com server.enableStaticServing = true (em "app/static/...")
+PASTA_STATIC = "static"
+PREFIXO_URL = "app/static/"
+ARQUIVO_MAPA = os.path.join(PASTA_STATIC, "ativos.json")
+
+# Artefatos pre-computados pelo build (otimizar.py) e lidos pelo app na partida
+PASTA_PRECOMPUTADOS = "precomputados"
+ARQUIVO_FUNDO = os.path.join(PASTA_PRECOMPUTADOS, "fundo.jpg")
+PASTA_FONTES = os.path.join(PASTA_PRECOMPUTADOS, "fontes")
+ARQUIVO_FONTES_CSS = os.path.join(PASTA_FONTES, "fontes.css")
+
+# Derivados multi-resolucao (otimizar.py) e preferencia de formato ao escolher um deles
+PASTA_DERIVADOS = "imagens_plantas/derivados"
+ARQUIVO_MANIFESTO = os.path.join(PASTA_DERIVADOS, "manifest.json")
+FORMATOS_PREFERIDOS = ("webp", "jpeg")
+MIME_FORMATO = {"webp": "image/webp", "jpeg": "image/jpeg"}
+# Largura CSS aproximada de cada slot no layout "wide"
+LARGURA_SLOT = {"card": 300, "detalhe": 400}
+
+# Arquivos publicados por padrao pelo build (alem das imagens das plantas)
+ATIVOS_FIXOS = ["image_ecaac2.png"]
+# Pastas varridas pelo build: o mesmo conjunto vai para static/ e para o pacote mmap
+PASTAS_ATIVOS = ("imagens_plantas", PASTA_DERIVADOS, PASTA_PRECOMPUTADOS, PASTA_FONTES)
+EXTENSOES_ATIVOS = (".png", ".jpg", ".jpeg", ".webp", ".woff2")
+
+def hash_conteudo(dados):
+    return hashlib.sha256(dados).hexdigest()[:16]
+
+def nome_com_hash(nome, digest):
+    raiz, ext = os.path.splitext(os.path.basename(nome))
+    return f"{raiz}.{digest}{ext}"
+
+def url_para(arquivo, digest):
+    # O "?v=" faz o StaticFileHandler do Tornado responder com Cache-Control de longa duracao;
+    # como o nome ja carrega o hash, a URL muda sempre que o conteudo muda.
+    return f"{PREFIXO_URL}{arquivo}?v={digest}"
+
+def carregar_manifesto_imagens():
+    if not os.path.exists(ARQUIVO_MANIFESTO): return None
+    try:
+        with open(ARQUIVO_MANIFESTO, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception: return None
+
+def escolher_variante(manifesto, plant_id, largura_px):
+    """Menor derivado com largura >= largura_px (ou o maior disponivel). Retorna (caminho, mime) ou None."""
+    variantes = (manifesto or {}).get("plantas", {}).get(plant_id)
+    if not variantes: return None
+    candidatos = []
+    for formatos in variantes.values():
+        fmt = next((f for f in FORMATOS_PREFERIDOS if f in formatos), None)
+        if fmt: candidatos.append((formatos[fmt]["largura"], fmt, formatos[fmt]["arquivo"]))
+    if not candidatos: return None
+    candidatos.sort()
+    largura, fmt, arquivo = next((c for c in candidatos if c[0] >= largura_px), candidatos[-1])
+    return os.path.join(PASTA_DERIVADOS, arquivo), MIME_FORMATO[fmt]
+
+def arquivo_publicado(chave, sha256):
+    """(nome em static/, digest) de um conteudo cujo sha256 ja e conhecido; mesma regra de publicar_bytes."""
+    digest = sha256[:16]
+    return nome_com_hash(chave, digest), digest
+
+def carregar_mapa():
+    if not os.path.exists(ARQUIVO_MAPA): return {}
+    try:
+        with open(ARQUIVO_MAPA, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception: return {}
+
+def salvar_mapa(mapa):
+    os.makedirs(PASTA_STATIC, exist_ok=True)
+    tmp = ARQUIVO_MAPA + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(mapa, f, indent=2, sort_keys=True)
+    os.replace(tmp, ARQUIVO_MAPA)
+
+def publicar_bytes(chave, dados):
+    """Grava `dados` em static/ com nome versionado pelo hash e devolve a URL publica."""
+    digest = hash_conteudo(dados)
+    arquivo = nome_com_hash(chave, digest)
+    destino = os.path.join(PASTA_STATIC, arquivo)
+    if not os.path.exists(destino):
+        os.makedirs(PASTA_STATIC, exist_ok=True)
+        tmp = destino + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(dados)
+        os.replace(tmp, destino)
+    return url_para(arquivo, digest)
+
+def publicar_arquivo(caminho):
+    with open(caminho, "rb") as f:
+        return publicar_bytes(caminho, f.read())
+
+def listar_ativos(pastas=PASTAS_ATIVOS, extras=ATIVOS_FIXOS):
+    """Mestres, derivados, fundo/fontes pre-computados e logo: tudo que o app le de disco."""
+    caminhos = []
+    for pasta in pastas:
+        if not os.path.isdir(pasta): continue
+        for arquivo in sorted(os.listdir(pasta)):
+            if arquivo.lower().endswith(EXTENSOES_ATIVOS):
+                caminhos.append(os.path.join(pasta, arquivo))
+    caminhos += [c for c in extras if os.path.exists(c)]
+    return caminhos
+
+def publicar_tudo(caminhos=None):
+    """Publica todas as imagens conhecidas e regrava o mapa caminho -> URL. Remove versoes antigas."""
+    caminhos = listar_ativos() if caminhos is None else caminhos
+
+    mapa = {}
+    for caminho in caminhos:
+        try:
+            mapa[caminho.replace(os.sep, "/")] = publicar_arquivo(caminho)
+        except Exception as e:
+            print(f"[FALHA] Nao foi possivel publicar {caminho}: {e}")
+
+    # Limpa versoes anteriores (mesmo nome-base, hash diferente) dos arquivos publicados
+    vivos = {url.split("?")[0][len(PREFIXO_URL):] for url in mapa.values()}
+    existentes = os.listdir(PASTA_STATIC) if os.path.isdir(PASTA_STATIC) else []
+    for vivo in vivos:
+        raiz, digest, ext = vivo.rsplit(".", 2)
+        for arquivo in existentes:
+            partes = arquivo.rsplit(".", 2)
+            if len(partes) == 3 and partes[0] == raiz and partes[2] == ext and arquivo not in vivos:
+                caminho = os.path.join(PASTA_STATIC, arquivo)
+                if os.path.exists(caminho): os.remove(caminho)
+
+    salvar_mapa(mapa)
+    print(f"[OK] {len(mapa)} ativos publicados em '{PASTA_STATIC}/' ({ARQUIVO_MAPA})")
+    return mapa
+
+# --- CACHE LRU DE ATIVOS CODIFICADOS ---
+class CacheAtivos:
+    """LRU limitado por bytes para ativos codificados (ex.: base64 das imagens).
+
+    Cada entrada e validada pelo (mtime, tamanho) do arquivo de origem; se mudarem, o hash do
+    conteudo decide entre reaproveitar e invalidar. Com `pasta_disco`, as entradas tambem sao
+    gravadas em disco para que um worker reiniciado nao precise recodificar nada.
+    """
+
+    def __init__(self, orcamento_bytes, pasta_disco=None, nome="ativos"):
+        self.orcamento = orcamento_bytes
+        self.pasta_disco = pasta_disco
+        self.nome = nome
+        self._entradas = OrderedDict()   # chave -> (assinatura, hash da origem, valor, tamanho)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidacoes": 0, "disco_hits": 0}
+        if pasta_disco:
+            os.makedirs(pasta_disco, exist_ok=True)
+
+    def _contar(self, evento, n=1):
+        self.stats[evento] += n
+        metricas.contar("cache_ativos_total", n, cache=self.nome, evento=evento)
+
+    @staticmethod
+    def _assinatura(origem):
+        st = os.stat(origem)
+        return st.st_mtime_ns, st.st_size
+
+    @staticmethod
+    def _tamanho(valor):
+        return len(valor) if isinstance(valor, (bytes, str)) else 0
+
+    def obter(self, chave, origem, produzir, digest=None):
+        """Valor de `chave`, gerado por `produzir()` no miss. `origem` e o arquivo que valida a entrada.
+
+        `digest` (opcional) e o hash ja conhecido do conteudo, evitando reler `origem` (ex.: item do pacote).
+        """
+        try:
+            assinatura = self._assinatura(origem)
+        except OSError:
+            self.remover(chave)
+            return None
+
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada[0] == assinatura:
+                self._entradas.move_to_end(chave)
+                self._contar("hits")
+                return entrada[2]
+
+        # Miss ou mtime mudou: o hash le o arquivo inteiro, entao roda fora do lock
+        # (as outras sessoes continuam servindo do cache) e a entrada e conferida de novo depois
+        if digest is None:
+            try:
+                digest = hash_arquivo(origem)
+            except OSError:
+                self.remover(chave)
+                return None
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None:
+                if entrada[1] == digest:
+                    # mtime mudou (checkout, touch...) mas o conteudo e o mesmo: reaproveita
+                    self._entradas[chave] = (assinatura,) + entrada[1:]
+                    self._entradas.move_to_end(chave)
+                    self._contar("hits")
+                    return entrada[2]
+                self._descartar(chave)
+                self._contar("invalidacoes")
+
+        valor = self._ler_disco(chave, digest)
+        if valor is not None:
+            self._contar("disco_hits")
+        else:
+            self._contar("misses")
+            valor = produzir()
+            if valor is None: return None
+            self._gravar_disco(chave, digest, valor)
+        self._inserir(chave, (assinatura, digest, valor, self._tamanho(valor)))
+        return valor
+
+    def _inserir(self, chave, entrada):
+        with self._lock:
+            if chave in self._entradas: self._descartar(chave)
+            if entrada[3] > self.orcamento: return  # maior que o orcamento inteiro: nao guarda
+            self._entradas[chave] = entrada
+            self._bytes += entrada[3]
+            while self._bytes > self.orcamento:
+                antiga, _ = next(iter(self._entradas.items()))
+                self._descartar(antiga)
+                self._contar("evictions")
+
+    def _descartar(self, chave):
+        entrada = self._entradas.pop(chave, None)
+        if entrada is not None: self._bytes -= entrada[3]
+
+    def remover(self, chave):
+        with self._lock:
+            self._descartar(chave)
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    # Persistencia: um arquivo por chave, nomeado pelo hash da chave e validado pelo hash da origem
+    def _caminho_disco(self, chave):
+        return os.path.join(self.pasta_disco, hashlib.sha256(chave.encode("utf-8")).hexdigest()[:32])
+
+    def _ler_disco(self, chave, digest):
+        if not self.pasta_disco: return None
+        caminho = self._caminho_disco(chave)
+        try:
+            with open(caminho, "rb") as f:
+                cabecalho = f.readline().decode("ascii").split()
+                corpo = f.read()
+        except (OSError, UnicodeDecodeError):
+            return None
+        if len(cabecalho) != 2 or cabecalho[0] != digest: return None
+        return corpo.decode("utf-8") if cabecalho[1] == "str" else corpo
+
+    def _gravar_disco(self, chave, digest, valor):
+        if not self.pasta_disco: return
+        tipo, corpo = ("str", valor.encode("utf-8")) if isinstance(valor, str) else ("bytes", valor)
+        caminho = self._caminho_disco(chave)
+        try:
+            tmp = caminho + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(f"{digest} {tipo}\n".encode("ascii"))
+                f.write(corpo)
+            os.replace(tmp, caminho)
+        except OSError:
+            pass
+
+    def estatisticas(self):
+        with self._lock:
+            return {**self.stats, "entradas": len(self._entradas), "bytes": self._bytes, "orcamento_bytes": self.orcamento}
+
+def hash_arquivo(caminho):
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+if __name__ == "__main__":
+    publicar_tudo()
@@ -0,0 +1,195 @@
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import platform
+import subprocess
+
+# Forcar encoding UTF-8 para evitar erros no Windows
+if sys.platform == "win32":
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except AttributeError:
+        pass
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+TAMANHOS_SINTETICOS = (100, 1000, 10000)
+# Alem dos modulos .py, itens do app vinculados no workspace de cada catalogo sintetico
+ARQUIVOS_APP = ("image_ecaac2.png", ".streamlit")
+DIGITACAO = "ashwa"
+CATEGORIAS = ("Hormonal", "Próstata", "Todas")
+TIMEOUT = 600
+
+# --- CATÁLOGOS SINTÉTICOS ---
+def gerar_catalogo(n, seed=42):
+    """n plantas derivadas das monografias reais (ids/nomes unicos, textos embaralhados)."""
+    from catalogo import carregar_catalogo
+    reais = [p.para_dict() for p in carregar_catalogo(os.path.join(RAIZ, "dados", "plantas.json"))]
+    rnd = random.Random(seed)
+    plantas = []
+    for i in range(n):
+        base = dict(reais[i % len(reais)])
+        base["id"] = f"{base['id']}{i:05d}"
+        base["nome"] = f"{base['nome']} {i}"
+        for campo in ("descricao", "mecanismo", "interacoes"):
+            outra = rnd.choice(reais)
+            base[campo] = f"{base[campo]} {outra[campo]}"
+        plantas.append(base)
+    return {"versao": 1, "fonte": f"sintetico-{n}", "plantas": plantas}
+
+def vincular(origem, destino):
+    try:
+        os.symlink(origem, destino)
+    except OSError:
+        (shutil.copytree if os.path.isdir(origem) else shutil.copy2)(origem, destino)
+
+def preparar_workspace(n):
+    """Pasta temporaria com o codigo do app, n plantas e uma imagem por planta."""
+    pasta = tempfile.mkdtemp(prefix=f"fito-bench-{n}-")
+    for nome in [f for f in os.listdir(RAIZ) if f.endswith(".py")] + list(ARQUIVOS_APP):
+        if os.path.exists(os.path.join(RAIZ, nome)):
+            vincular(os.path.join(RAIZ, nome), os.path.join(pasta, nome))
+    os.makedirs(os.path.join(pasta, "dados"))
+    catalogo = gerar_catalogo(n)
+    with open(os.path.join(pasta, "dados", "plantas.json"), "w", encoding="utf-8") as f:
+        json.dump(catalogo, f, ensure_ascii=False)
+
+    # Imagens: reaproveita as fotos reais, uma por id sintetico
+    pasta_img = os.path.join(pasta, "imagens_plantas")
+    os.makedirs(pasta_img)
+    fotos = sorted(f for f in os.listdir(os.path.join(RAIZ, "imagens_plantas")) if f.endswith(".jpg"))
+    for i, planta in enumerate(catalogo["plantas"]):
+        vincular(os.path.join(RAIZ, "imagens_plantas", fotos[i % len(fotos)]), os.path.join(pasta_img, f"{planta['id']}.jpg"))
+    return pasta
+
+# --- MEDIÇÃO ---
+def bytes_emitidos(no):
+    """Soma do tamanho serializado (protobuf) de todos os elementos da arvore do AppTest."""
+    filhos = getattr(no, "children", None)
+    if filhos is not None:
+        return sum(bytes_emitidos(filho) for filho in filhos.values())
+    proto = getattr(no, "proto", None)
+    return proto.ByteSize() if proto is not None else 0
+
+def eh_botao_card(botao):
+    # "Ver Detalhes" de cada card (btn_<id>); "btn_carregar_mais" e o botao da paginacao
+    chave = str(botao.key or "")
+    return chave.startswith("btn_") and chave != "btn_carregar_mais"
+
+def medir(passos, nome, acao):
+    inicio = time.perf_counter()
+    at = acao()
+    tempo = time.perf_counter() - inicio
+    if at.exception:
+        raise RuntimeError(f"{nome}: {at.exception[0].message}")
+    passos.append({
+        "passo": nome,
+        "tempo_ms": round(tempo * 1000, 2),
+        "bytes": bytes_emitidos(at._tree),
+        "cards": sum(1 for b in at.button if eh_botao_card(b)),
+    })
+    return at
+
+def executar_roteiro(pasta):
+    """home -> digitacao na busca -> filtros de categoria -> abrir detalhe -> voltar."""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    anterior = os.getcwd()
+    os.chdir(pasta)
+    try:
+        at = AppTest.from_file(os.path.join(pasta, "app.py"), default_timeout=TIMEOUT)
+        passos = []
+        medir(passos, "home (frio)", at.run)
+        medir(passos, "home (quente)", at.run)
+        for i in range(1, len(DIGITACAO) + 1):
+            medir(passos, f"busca '{DIGITACAO[:i]}'", lambda: at.text_input[0].input(DIGITACAO[:i]).run())
+        medir(passos, "busca limpa", lambda: at.text_input[0].input("").run())
+        for categoria in CATEGORIAS:
+            medir(passos, f"categoria {categoria}", lambda: at.selectbox[0].select(categoria).run())
+        primeiro = next(b.key for b in at.button if eh_botao_card(b))
+        medir(passos, "abrir detalhe", lambda: at.button(key=primeiro).click().run())
+        medir(passos, "voltar", lambda: at.button(key="back_btn").click().run())
+        return passos
+    finally:
+        os.chdir(anterior)
+
+def resumir(passos):
+    tempos = sorted(p["tempo_ms"] for p in passos)
+    return {
+        "tempo_total_ms": round(sum(tempos), 2),
+        "tempo_mediano_ms": tempos[len(tempos) // 2],
+        "tempo_max_ms": tempos[-1],
+        "bytes_max": max(p["bytes"] for p in passos),
+        "bytes_total": sum(p["bytes"] for p in passos),
+    }
+
+def commit_atual():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, text=True).strip()
+    except Exception: return None
+
+def comparar(atual, anterior):
+    print(f"\n--- COMPARACAO com {anterior.get('commit')} ---")
+    for nome, dados in atual["catalogos"].items():
+        antes = anterior.get("catalogos", {}).get(nome)
+        if not antes: continue
+        for chave in ("tempo_total_ms", "tempo_max_ms", "bytes_max"):
+            a, b = antes["resumo"][chave], dados["resumo"][chave]
+            delta = (b - a) / a * 100 if a else 0.0
+            print(f"  {nome:>8} {chave:<16} {a:>14} -> {b:<14} ({delta:+.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark headless do app (AppTest): tempo por rerun e bytes por view.")
+    parser.add_argument("--tamanhos", type=int, nargs="*", default=list(TAMANHOS_SINTETICOS), help="Catalogos sinteticos a medir.")
+    parser.add_argument("--saida", default="bench_resultados.json", help="Arquivo JSON com os resultados.")
+    parser.add_argument("--comparar", help="JSON de uma execucao anterior para comparar.")
+    parser.add_argument("--ativos", choices=("base64", "estatico"), default="base64", help="Modo de ativos do app (FITO_ATIVOS).")
+    args = parser.parse_args()
+    os.environ["FITO_ATIVOS"] = args.ativos
+
+    resultado = {
+        "commit": commit_atual(),
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "ativos": args.ativos,
+        "catalogos": {},
+    }
+    try:
+        import streamlit
+        resultado["streamlit"] = streamlit.__version__
+    except ImportError:
+        print("[ERRO] Streamlit nao instalado (pip install -r requirements.txt).")
+        return 1
+
+    alvos = [("real", RAIZ, None)] + [(str(n), None, n) for n in args.tamanhos]
+    for nome, pasta, n in alvos:
+        print(f"[INFO] Catalogo {nome}...")
+        temporaria = pasta is None
+        if temporaria:
+            pasta = preparar_workspace(n)
+        try:
+            passos = executar_roteiro(pasta)
+        finally:
+            if temporaria: shutil.rmtree(pasta, ignore_errors=True)
+        resultado["catalogos"][nome] = {"passos": passos, "resumo": resumir(passos)}
+        for p in passos:
+            print(f"  {p['passo']:<20} {p['tempo_ms']:>10.1f} ms {p['bytes']:>12} bytes {p['cards']:>6} cards")
+
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\n[OK] Resultados salvos em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            comparar(resultado, json.load(f))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+import re
+import math
+import bisect
+import unicodedata
+
+# Peso de cada campo da monografia na relevancia
+PESOS_CAMPOS = {
+    "nome": 5.0,
+    "nome_cientifico": 4.0,
+    "mecanismo": 3.0,
+    "categoria": 2.0,
+    "descricao": 2.0,
+    "interacoes": 2.0,
+    "contraindicacoes": 2.0,
+    "adversos": 1.0,
+    "dose": 0.5,
+}
+
+# Qualidade do casamento de um termo da consulta com um termo do indice
+PESO_EXATO = 1.0
+PESO_PREFIXO = 0.7
+PESO_APROXIMADO = 0.5
+
+PREFIXO_MINIMO = 2      # "ad" ja expande para "adaptogeno"
+PREFIXO_DIGITANDO = 1   # ultimo termo ainda sendo digitado: "a" ja expande (busca a cada tecla)
+APROXIMADO_MINIMO = 4   # termos curtos demais nao passam por correcao de digitacao
+
+def normalizar(texto):
+    """Minusculas sem acentos: 'Adaptógeno' -> 'adaptogeno'."""
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode().lower()
+
+def tokenizar(texto):
+    """'5-alfa-redutase (Testo -> DHT)' -> ['5', 'alfa', 'redutase', 'testo', 'dht']."""
+    return re.findall(r"[a-z0-9]+", normalizar(texto))
+
+def trigramas(termo):
+    t = f"  {termo} "
+    return {t[i:i + 3] for i in range(len(t) - 2)}
+
+def distancia_edicao(a, b, limite):
+    """Levenshtein com corte: devolve limite + 1 assim que ultrapassar `limite`."""
+    if abs(len(a) - len(b)) > limite: return limite + 1
+    anterior = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        atual = [i]
+        for j, cb in enumerate(b, 1):
+            atual.append(min(anterior[j] + 1, atual[j - 1] + 1, anterior[j - 1] + (ca != cb)))
+        if min(atual) > limite: return limite + 1
+        anterior = atual
+    return anterior[-1]
+
+def tolerancia(termo):
+    return 1 if len(termo) <= 6 else 2
+
+class IndiceBusca:
+    """Indice invertido + trigramas sobre todos os campos de texto do catalogo.
+
+    Construido uma vez por processo; cada consulta custa proporcional aos termos/documentos casados.
+    """
+
+    def __init__(self, plantas):
+        self.plantas = tuple(plantas)
+        self.postings = {}    # termo -> {indice da planta: peso acumulado dos campos}
+        self.trigramas = {}   # trigrama -> set(termos)
+        for idx, planta in enumerate(self.plantas):
+            for campo, peso in PESOS_CAMPOS.items():
+                for termo in set(tokenizar(getattr(planta, campo))):
+                    docs = self.postings.setdefault(termo, {})
+                    docs[idx] = docs.get(idx, 0.0) + peso
+        self.vocabulario = sorted(self.postings)
+        for termo in self.vocabulario:
+            for tri in trigramas(termo):
+                self.trigramas.setdefault(tri, set()).add(termo)
+        n = len(self.plantas)
+        self.idf = {termo: 1.0 + math.log((n + 1) / (len(docs) + 1)) for termo, docs in self.postings.items()}
+
+    def expandir(self, termo, prefixo_minimo=PREFIXO_MINIMO):
+        """Termos do indice que casam com `termo` -> qualidade do casamento."""
+        casados = {}
+        if termo in self.postings:
+            casados[termo] = PESO_EXATO
+        if len(termo) >= prefixo_minimo:
+            i = bisect.bisect_left(self.vocabulario, termo)
+            while i < len(self.vocabulario) and self.vocabulario[i].startswith(termo):
+                casados.setdefault(self.vocabulario[i], PESO_PREFIXO)
+                i += 1
+        if not casados and len(termo) >= APROXIMADO_MINIMO:
+            # Candidatos que compartilham trigramas; confirma com distancia de edicao
+            contagem = {}
+            for tri in trigramas(termo):
+                for candidato in self.trigramas.get(tri, ()):
+                    contagem[candidato] = contagem.get(candidato, 0) + 1
+            limite = tolerancia(termo)
+            minimo = max(1, len(trigramas(termo)) - 3 * limite)
+            for candidato, comuns in contagem.items():
+                if comuns >= minimo and distancia_edicao(termo, candidato[:len(termo) + limite], limite) <= limite:
+                    casados[candidato] = PESO_APROXIMADO
+        return casados
+
+    def buscar(self, consulta, limite=None):
+        """Plantas que casam com TODOS os termos da consulta, da mais para a menos relevante."""
+        termos = tokenizar(consulta)
+        if not termos: return list(self.plantas)
+
+        # Sem espaco no fim, o ultimo termo ainda esta sendo digitado e vale como prefixo desde 1 letra
+        digitando = None if consulta[-1:].isspace() else termos[-1]
+        pontuacao = None
+        for termo in dict.fromkeys(termos):
+            parcial = {}
+            minimo = PREFIXO_DIGITANDO if termo == digitando else PREFIXO_MINIMO
+            for casado, qualidade in self.expandir(termo, minimo).items():
+                fator = qualidade * self.idf[casado]
+                for idx, peso in self.postings[casado].items():
+                    valor = peso * fator
+                    if valor > parcial.get(idx, 0.0): parcial[idx] = valor
+            if pontuacao is None:
+                pontuacao = parcial
+            else:
+                pontuacao = {idx: pontuacao[idx] + v for idx, v in parcial.items() if idx in pontuacao}
+            if not pontuacao: return []
+
+        ordem = sorted(pontuacao, key=lambda idx: (-pontuacao[idx], idx))
+        if limite is not None: ordem = ordem[:limite]
+        return [self.plantas[idx] for idx in ordem]
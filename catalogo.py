@@ -0,0 +1,99 @@
+import os
+import re
+import json
+
+# Arquivo versionado com as monografias (gerado/atualizado fora do app)
+ARQUIVO_PLANTAS = os.path.join("dados", "plantas.json")
+VERSAO_SUPORTADA = 1
+
+# Opcoes do filtro de categoria (app e site estatico); "Todas" = sem filtro
+CATEGORIAS_FILTRO = ("Todas", "Hormonal", "Adaptógeno", "Próstata", "Anabólico Natural", "Metabólico")
+
+CAMPOS = ("id", "nome", "nome_cientifico", "categoria", "descricao", "mecanismo",
+          "dose", "interacoes", "adversos", "contraindicacoes", "nivel_evidencia")
+
+# --- CLASSE DE DADOS ---
+class Planta:
+    # __slots__: sem __dict__ por registro, o que importa com milhares de monografias
+    __slots__ = CAMPOS
+
+    def __init__(self, id_planta, nome, nome_cientifico, categoria, descricao, mecanismo, dose, interacoes, adversos, contraindicacoes, nivel_evidencia):
+        self.id = id_planta
+        self.nome = nome
+        self.nome_cientifico = nome_cientifico
+        self.categoria = categoria
+        self.descricao = descricao
+        self.mecanismo = mecanismo
+        self.dose = dose
+        self.interacoes = interacoes
+        self.adversos = adversos
+        self.contraindicacoes = contraindicacoes
+        self.nivel_evidencia = nivel_evidencia
+
+    @classmethod
+    def de_dict(cls, d):
+        return cls(d["id"], *(d.get(campo, "") for campo in CAMPOS[1:]))
+
+    def para_dict(self):
+        return {campo: getattr(self, campo) for campo in CAMPOS}
+
+    def __repr__(self):
+        return f"Planta({self.id!r})"
+
+def categorias_base(categoria):
+    """'Próstata / SHBG' -> ['Próstata', 'SHBG']; 'Hormonal (Exp)' -> ['Hormonal']."""
+    sem_notas = re.sub(r"\s*\(.*?\)", "", categoria)
+    return [c.strip() for c in sem_notas.split("/") if c.strip()]
+
+# --- CATÁLOGO INDEXADO ---
+class Catalogo:
+    """Lista imutavel de plantas com indices pre-computados (ordem original preservada)."""
+
+    def __init__(self, plantas, versao=VERSAO_SUPORTADA):
+        self.versao = versao
+        self.plantas = tuple(plantas)
+        self.por_id = {}
+        self.por_categoria = {}
+        self.por_evidencia = {}
+        for planta in self.plantas:
+            if planta.id in self.por_id:
+                raise ValueError(f"id duplicado no catalogo: {planta.id}")
+            self.por_id[planta.id] = planta
+            for categoria in categorias_base(planta.categoria):
+                self.por_categoria.setdefault(categoria, []).append(planta)
+            self.por_evidencia.setdefault(planta.nivel_evidencia, []).append(planta)
+
+    def __len__(self):
+        return len(self.plantas)
+
+    def __iter__(self):
+        return iter(self.plantas)
+
+    def get(self, plant_id):
+        return self.por_id.get(plant_id)
+
+    def filtrar(self, categoria=None, evidencia=None):
+        """Interseccao dos indices; None = sem filtro."""
+        resultado = self.plantas
+        if categoria is not None:
+            resultado = self.por_categoria.get(categoria, [])
+        if evidencia is not None:
+            ids = {p.id for p in self.por_evidencia.get(evidencia, [])}
+            resultado = [p for p in resultado if p.id in ids]
+        return resultado
+
+def carregar_catalogo(caminho=ARQUIVO_PLANTAS):
+    with open(caminho, encoding="utf-8") as f:
+        dados = json.load(f)
+    versao = dados.get("versao")
+    if versao != VERSAO_SUPORTADA:
+        raise ValueError(f"{caminho}: versao {versao} nao suportada (esperado {VERSAO_SUPORTADA})")
+    return Catalogo([Planta.de_dict(d) for d in dados["plantas"]], versao=versao)
+
+def salvar_catalogo(catalogo, caminho=ARQUIVO_PLANTAS, **extras):
+    dados = {"versao": VERSAO_SUPORTADA, **extras, "plantas": [p.para_dict() for p in catalogo]}
+    tmp = caminho + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+        f.write("\n")
+    os.replace(tmp, caminho)
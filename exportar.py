@@ -0,0 +1,386 @@
+import os
+import re
+import sys
+import json
+import html
+import hashlib
+import argparse
+
+import ativos
+import busca
+from catalogo import ARQUIVO_PLANTAS, CATEGORIAS_FILTRO, carregar_catalogo, categorias_base
+from busca import IndiceBusca
+from fragmentos import (VERSAO_TEMPLATES, FONTES_GOOGLE, CABECALHO_HOME_HTML, CARD_SEM_IMAGEM, MARCADOR_IMAGEM,
+                        css_html, escapar_planta, html_img, render_card_html, render_details_html,
+                        render_foto_html, render_resumo_html)
+
+# Forcar encoding UTF-8 para evitar erros no Windows
+if sys.platform == "win32":
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except AttributeError:
+        pass
+
+# Site estatico do catalogo publico (servivel por qualquer CDN/servidor de arquivos):
+#   site/index.html             grid completo + busca/filtro no navegador
+#   site/plantas/<id>.html      uma pagina por monografia
+#   site/assets/<nome>.<hash>   imagens, fontes, CSS, JS e indice de busca (imutaveis: cache eterno)
+#   site/.export.json           estado da ultima exportacao (hash por planta) para reexportar so o que mudou
+PASTA_SITE = "site"
+PASTA_ASSETS = "assets"
+PASTA_PAGINAS = "plantas"
+ARQUIVO_ESTADO = ".export.json"
+VERSAO_EXPORT = 1
+
+LOGO = "image_ecaac2.png"
+LINK_APOIO = "https://www.plantaciencia.com/"
+LINK_LIVRO = "https://www.plantaciencia.com/_files/ugd/aedcbc_09803571856343ea82fed6ba99b0b7f2.pdf"
+
+# Complemento do CSS do app para o layout sem Streamlit (grid, barra de busca, botoes-link)
+CSS_SITE = """
+body { margin: 0; }
+.block-container { max-width: 1200px; margin: 0 auto; padding-left: 1rem; padding-right: 1rem; }
+.barra-busca { display: grid; grid-template-columns: 3fr 1fr; gap: 16px; margin-bottom: 24px; }
+.barra-busca input, .barra-busca select { font-family: 'Fauna One', serif; font-size: 1rem; padding: 10px 14px; border: 1px solid #c8c8c8; border-radius: 8px; background: rgba(255, 255, 255, 0.95); }
+.grid-plantas { display: grid; grid-template-columns: repeat(auto-fill, minmax(240px, 1fr)); gap: 24px; }
+.celula-planta { display: flex; flex-direction: column; gap: 12px; }
+.celula-planta[hidden] { display: none; }
+.botao { display: inline-block; background-color: #1a472a; color: #FFFFFF !important; border-radius: 30px; border: 2px solid #1a472a; padding: 8px 20px; font-family: 'Cinzel', serif; font-weight: bold; text-decoration: none; text-align: center; }
+.botao:hover { background-color: #2d5a3f; border-color: #2d5a3f; }
+.colunas-detalhe { display: grid; grid-template-columns: 1fr 2fr; gap: 32px; margin-top: 20px; }
+.taped-photo img { width: 100%; }
+.rodape { margin-top: 60px; padding: 20px; background-color: rgba(255, 253, 245, 0.96); border-radius: 15px; font-size: 0.9em; text-align: center; }
+.rodape .sidebar-logo { width: 180px; }
+@media (max-width: 800px) { .colunas-detalhe, .barra-busca { grid-template-columns: 1fr; } }
+"""
+
+# Busca no navegador: mesma logica de busca.IndiceBusca (exato, prefixo, aproximado; todos os termos)
+JS_BUSCA = """
+(function () {
+  var indice = null, campo = document.getElementById("busca"), filtro = document.getElementById("categoria");
+  var grid = document.getElementById("grid"), celulas = Array.prototype.slice.call(grid.children);
+  var contador = document.getElementById("contador");
+  function normalizar(t) { return t.normalize("NFKD").replace(/[\\u0300-\\u036f]/g, "").toLowerCase(); }
+  function tokenizar(t) { return normalizar(t).match(/[a-z0-9]+/g) || []; }
+  function distancia(a, b, limite) {
+    if (Math.abs(a.length - b.length) > limite) return limite + 1;
+    var ant = [], i, j;
+    for (j = 0; j <= b.length; j++) ant.push(j);
+    for (i = 1; i <= a.length; i++) {
+      var atual = [i], menor = i;
+      for (j = 1; j <= b.length; j++) {
+        atual.push(Math.min(ant[j] + 1, atual[j - 1] + 1, ant[j - 1] + (a[i - 1] !== b[j - 1] ? 1 : 0)));
+        menor = Math.min(menor, atual[j]);
+      }
+      if (menor > limite) return limite + 1;
+      ant = atual;
+    }
+    return ant[b.length];
+  }
+  function expandir(termo, minimo) {
+    var casados = {}, p = indice.pesos, voc = indice.vocabulario, i;
+    if (indice.postings[termo]) casados[termo] = p.exato;
+    if (termo.length >= minimo) {
+      for (i = 0; i < voc.length; i++) if (voc[i].lastIndexOf(termo, 0) === 0 && !(voc[i] in casados)) casados[voc[i]] = p.prefixo;
+    }
+    if (!Object.keys(casados).length && termo.length >= p.aproximado_minimo) {
+      var limite = termo.length <= 6 ? 1 : 2;
+      for (i = 0; i < voc.length; i++) if (distancia(termo, voc[i].slice(0, termo.length + limite), limite) <= limite) casados[voc[i]] = p.aproximado;
+    }
+    return casados;
+  }
+  function buscar(consulta) {
+    var termos = tokenizar(consulta), pontuacao = null, vistos = {};
+    if (!termos.length) return null;
+    var digitando = /\\s$/.test(consulta) ? null : termos[termos.length - 1];
+    for (var t = 0; t < termos.length; t++) {
+      if (vistos[termos[t]]) continue;
+      vistos[termos[t]] = true;
+      var parcial = {}, casados = expandir(termos[t], termos[t] === digitando ? indice.pesos.prefixo_digitando : indice.pesos.prefixo_minimo);
+      for (var termo in casados) {
+        var fator = casados[termo] * indice.idf[termo], docs = indice.postings[termo];
+        for (var k = 0; k < docs.length; k++) {
+          var valor = docs[k][1] * fator;
+          if (!(docs[k][0] in parcial) || valor > parcial[docs[k][0]]) parcial[docs[k][0]] = valor;
+        }
+      }
+      if (pontuacao === null) pontuacao = parcial;
+      else { var novo = {}; for (var idx in parcial) if (idx in pontuacao) novo[idx] = pontuacao[idx] + parcial[idx]; pontuacao = novo; }
+      if (!Object.keys(pontuacao).length) return [];
+    }
+    return Object.keys(pontuacao).map(Number).sort(function (a, b) { return pontuacao[b] - pontuacao[a] || a - b; });
+  }
+  function atualizar() {
+    var categoria = filtro.value, ordem = indice && campo.value ? buscar(campo.value) : null;
+    var visiveis = 0, posicao = {};
+    if (ordem) ordem.forEach(function (idx, i) { posicao[idx] = i; });
+    celulas.forEach(function (c) {
+      var idx = Number(c.dataset.idx);
+      var ok = (ordem === null || idx in posicao) && (categoria === "Todas" || c.dataset.categorias.split("|").indexOf(categoria) >= 0);
+      c.hidden = !ok;
+      c.style.order = ordem && ok ? posicao[idx] : idx;
+      if (ok) visiveis++;
+    });
+    contador.textContent = visiveis === celulas.length ? "" : "Mostrando " + visiveis + " de " + celulas.length + " plantas";
+  }
+  fetch(grid.dataset.indice).then(function (r) { return r.json(); }).then(function (dados) { indice = dados; atualizar(); });
+  campo.addEventListener("input", atualizar);
+  filtro.addEventListener("change", atualizar);
+})();
+"""
+
+# --- ATIVOS COM HASH ---
+class Ativos:
+    """Copia arquivos/bytes para assets/ com o hash no nome; devolve o caminho relativo a raiz do site."""
+
+    def __init__(self, pasta_site):
+        self.pasta = os.path.join(pasta_site, PASTA_ASSETS)
+        os.makedirs(self.pasta, exist_ok=True)
+        self.usados = set()
+        self.copiados = 0
+        self._por_origem = {}
+
+    def bytes(self, nome, dados):
+        arquivo = ativos.nome_com_hash(nome, ativos.hash_conteudo(dados))
+        destino = os.path.join(self.pasta, arquivo)
+        # Nome ja carrega o hash: se existe, o conteudo e o mesmo
+        if not os.path.exists(destino):
+            tmp = destino + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(dados)
+            os.replace(tmp, destino)
+            self.copiados += 1
+        self.usados.add(arquivo)
+        return f"{PASTA_ASSETS}/{arquivo}"
+
+    def arquivo(self, caminho):
+        if caminho not in self._por_origem:
+            with open(caminho, "rb") as f:
+                self._por_origem[caminho] = self.bytes(caminho, f.read())
+        return self._por_origem[caminho]
+
+    def texto(self, nome, texto):
+        return self.bytes(nome, texto.encode("utf-8"))
+
+    def limpar_orfaos(self, anteriores):
+        """Remove os ativos da exportacao anterior que nenhuma pagina referencia mais.
+
+        So apaga o que o estado anterior registrou: arquivos alheios em assets/ ficam intactos.
+        """
+        removidos = 0
+        for arquivo in set(anteriores) - self.usados:
+            caminho = os.path.join(self.pasta, os.path.basename(arquivo))
+            if os.path.isfile(caminho):
+                os.remove(caminho)
+                removidos += 1
+        return removidos
+
+# --- IMAGENS ---
+def fontes_imagem(ativos_site, manifesto, plant_id, slot, densidades):
+    """[(url relativa a raiz, densidade)] com os derivados do manifesto; sem eles, o JPG mestre."""
+    largura = ativos.LARGURA_SLOT[slot]
+    fontes = []
+    for densidade in densidades:
+        escolhido = ativos.escolher_variante(manifesto, plant_id, largura * densidade)
+        if escolhido and os.path.exists(escolhido[0]):
+            url = ativos_site.arquivo(escolhido[0])
+            if url not in (u for u, _ in fontes): fontes.append((url, densidade))
+    if not fontes:
+        mestre = os.path.join("imagens_plantas", f"{plant_id}.jpg")
+        if os.path.exists(mestre): fontes = [(ativos_site.arquivo(mestre), 1)]
+    return fontes
+
+def com_prefixo(fontes, prefixo):
+    return [(prefixo + url, densidade) for url, densidade in fontes]
+
+# --- CHROME (CSS, FONTES, FUNDO, LOGO) ---
+def fontes_css(ativos_site):
+    """@font-face auto-hospedado (precomputados/fontes) com URLs relativas ao proprio CSS em assets/."""
+    if not os.path.exists(ativos.ARQUIVO_FONTES_CSS): return FONTES_GOOGLE
+    with open(ativos.ARQUIVO_FONTES_CSS, encoding="utf-8") as f:
+        css = f.read()
+    def trocar(m):
+        url = ativos_site.arquivo(os.path.join(ativos.PASTA_FONTES, m.group(1)))
+        return f"url({url[len(PASTA_ASSETS) + 1:]})"
+    return re.sub(r"url\(([^)/:]+\.woff2)\)", trocar, css)
+
+def gerar_chrome(ativos_site):
+    """CSS unico do site (app + complemento) e logo; devolve {"css", "logo"} relativos a raiz."""
+    bg_url = None
+    if os.path.exists(ativos.ARQUIVO_FUNDO):
+        # url() no CSS e relativa ao proprio arquivo, que fica em assets/
+        bg_url = ativos_site.arquivo(ativos.ARQUIVO_FUNDO)[len(PASTA_ASSETS) + 1:]
+    else:
+        print(f"[AVISO] {ativos.ARQUIVO_FUNDO} nao encontrado (rode otimizar.py); site sem imagem de fundo.")
+    css = css_html(bg_url, fontes_css(ativos_site))
+    css = css.strip()[len("<style>"):-len("</style>")] + CSS_SITE
+    return {
+        "css": ativos_site.texto("estilo.css", css),
+        "js": ativos_site.texto("busca.js", JS_BUSCA),
+        "logo": ativos_site.arquivo(LOGO) if os.path.exists(LOGO) else None,
+    }
+
+def pagina(titulo, descricao, chrome, prefixo, corpo, scripts=""):
+    logo = f'<a href="{LINK_APOIO}" target="_blank"><img src="{prefixo}{chrome["logo"]}" class="sidebar-logo"></a>' if chrome["logo"] else ""
+    return (
+        '<!DOCTYPE html>\n'
+        '<html lang="pt-BR">\n<head>\n'
+        '<meta charset="utf-8">\n'
+        '<meta name="viewport" content="width=device-width, initial-scale=1">\n'
+        f'<title>{titulo}</title>\n'
+        f'<meta name="description" content="{descricao}">\n'
+        f'<link rel="stylesheet" href="{prefixo}{chrome["css"]}">\n'
+        '</head>\n<body class="stApp">\n'
+        f'<div class="block-container">\n{corpo}\n'
+        '<div class="rodape">'
+        f'{logo}'
+        '<p>⚠️ <strong>Uso profissional</strong>: destinado a profissionais prescritores habilitados; '
+        'não substitui a avaliação clínica do profissional.</p>'
+        f'<p><a href="{LINK_LIVRO}" target="_blank">📥 Baixar Livro (PDF)</a></p>'
+        '<p>Copyright © 2025 Thiago Abranches. Todos os direitos reservados.</p>'
+        '</div>\n</div>\n'
+        f'{scripts}'
+        '</body>\n</html>\n'
+    )
+
+# --- PÁGINAS ---
+def pagina_detalhe(planta, chrome, fontes_detalhe):
+    escapada = escapar_planta(planta)
+    prefixo = "../"
+    img = html_img(com_prefixo(fontes_detalhe, prefixo), estilo="width: 100%;") if fontes_detalhe else None
+    corpo = (
+        '<div class="stButton"><a class="botao" href="../index.html">← Voltar ao Herbário</a></div>'
+        '<div class="colunas-detalhe">'
+        f'<div>{render_foto_html(escapada, img)}{render_resumo_html(escapada)}</div>'
+        f'<div>{render_details_html(escapada)}</div>'
+        '</div>'
+    )
+    titulo = f"{escapada.nome} ({escapada.nome_cientifico}) | Herbário Digital"
+    return pagina(titulo, escapada.descricao, chrome, prefixo, corpo)
+
+def pagina_inicial(catalogo, chrome, fontes_card, url_indice):
+    celulas = []
+    for idx, planta in enumerate(catalogo):
+        escapada = escapar_planta(planta)
+        fontes = fontes_card.get(planta.id)
+        img = html_img(fontes, classe="card-img-v2", lazy=True) if fontes else CARD_SEM_IMAGEM
+        card = render_card_html(escapada, MARCADOR_IMAGEM, "#2D6A4F", "#FFFFFF").replace(MARCADOR_IMAGEM, img)
+        categorias = html.escape("|".join(categorias_base(planta.categoria)))
+        celulas.append(
+            f'<div class="celula-planta" data-idx="{idx}" data-categorias="{categorias}">'
+            f'{card}'
+            f'<a class="botao" href="{PASTA_PAGINAS}/{planta.id}.html">Ver Detalhes</a>'
+            '</div>'
+        )
+    opcoes = "".join(f'<option>{html.escape(c)}</option>' for c in CATEGORIAS_FILTRO)
+    corpo = (
+        f'{CABECALHO_HOME_HTML}'
+        '<div class="barra-busca">'
+        '<input id="busca" type="search" placeholder="🔍 Nome, mecanismo, interação..." aria-label="Pesquisar">'
+        f'<select id="categoria" aria-label="Categoria">{opcoes}</select>'
+        '</div>'
+        f'<div id="grid" class="grid-plantas" data-indice="{url_indice}">{"".join(celulas)}</div>'
+        '<p id="contador" style="margin-top: 20px;"></p>'
+    )
+    scripts = f'<script src="{chrome["js"]}" defer></script>\n'
+    return pagina("Herbário Digital | Plantas Medicinais e Desempenho Físico",
+                  "Guia de Plantas Medicinais e Desempenho Físico", chrome, "", corpo, scripts)
+
+def indice_busca_json(catalogo):
+    """Postings/idf do IndiceBusca em JSON compacto (o navegador refaz exato/prefixo/aproximado)."""
+    indice = IndiceBusca(catalogo)
+    dados = {
+        "pesos": {"exato": busca.PESO_EXATO, "prefixo": busca.PESO_PREFIXO, "aproximado": busca.PESO_APROXIMADO,
+                  "prefixo_minimo": busca.PREFIXO_MINIMO, "prefixo_digitando": busca.PREFIXO_DIGITANDO,
+                  "aproximado_minimo": busca.APROXIMADO_MINIMO},
+        "vocabulario": indice.vocabulario,
+        "idf": {termo: round(v, 4) for termo, v in indice.idf.items()},
+        "postings": {termo: [[idx, peso] for idx, peso in sorted(docs.items())] for termo, docs in indice.postings.items()},
+    }
+    return json.dumps(dados, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+# --- EXPORTAÇÃO INCREMENTAL ---
+def hash_planta(planta, fontes, chrome):
+    conteudo = json.dumps([VERSAO_EXPORT, VERSAO_TEMPLATES, planta.para_dict(), fontes, chrome], sort_keys=True)
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()[:16]
+
+def carregar_estado(pasta_site):
+    try:
+        with open(os.path.join(pasta_site, ARQUIVO_ESTADO), encoding="utf-8") as f:
+            estado = json.load(f)
+    except (OSError, ValueError):
+        return {"versao": VERSAO_EXPORT, "plantas": {}, "ativos": []}
+    # Versao antiga: refaz todas as paginas, mas ainda sabe quais ativos foram gerados por ela
+    plantas = estado.get("plantas", {}) if estado.get("versao") == VERSAO_EXPORT else {}
+    return {"versao": VERSAO_EXPORT, "plantas": plantas, "ativos": estado.get("ativos", [])}
+
+def pasta_segura(pasta_site):
+    """So exporta para uma pasta nova/vazia ou que ja tenha o estado de uma exportacao anterior."""
+    if not os.path.isdir(pasta_site): return True
+    return os.path.exists(os.path.join(pasta_site, ARQUIVO_ESTADO)) or not os.listdir(pasta_site)
+
+def gravar_texto(caminho, texto):
+    tmp = caminho + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(texto)
+    os.replace(tmp, caminho)
+
+def exportar(pasta_site=PASTA_SITE, forcar=False, caminho_plantas=ARQUIVO_PLANTAS):
+    catalogo = carregar_catalogo(caminho_plantas)
+    if not pasta_segura(pasta_site):
+        print(f"[ERRO] '{pasta_site}' nao esta vazia e nao tem {ARQUIVO_ESTADO}: nao parece um site exportado.")
+        print("Escolha outra pasta com --saida.")
+        return 1
+    os.makedirs(os.path.join(pasta_site, PASTA_PAGINAS), exist_ok=True)
+    estado = carregar_estado(pasta_site)
+    if forcar:
+        # Regrava todas as paginas; nada fora do que o estado registra e apagado
+        estado["plantas"] = {plant_id: None for plant_id in estado["plantas"]}
+    ativos_site = Ativos(pasta_site)
+    manifesto = ativos.carregar_manifesto_imagens()
+
+    chrome = gerar_chrome(ativos_site)
+    fontes_card, hashes, geradas = {}, {}, 0
+    for planta in catalogo:
+        fontes_card[planta.id] = fontes_imagem(ativos_site, manifesto, planta.id, "card", (1,))
+        fontes_detalhe = fontes_imagem(ativos_site, manifesto, planta.id, "detalhe", (1, 2))
+        hashes[planta.id] = hash_planta(planta, fontes_detalhe, chrome)
+        caminho = os.path.join(pasta_site, PASTA_PAGINAS, f"{planta.id}.html")
+        if estado["plantas"].get(planta.id) == hashes[planta.id] and os.path.exists(caminho): continue
+        gravar_texto(caminho, pagina_detalhe(planta, chrome, fontes_detalhe))
+        geradas += 1
+        print(f"[OK] {PASTA_PAGINAS}/{planta.id}.html")
+
+    # Plantas que sairam do catalogo
+    removidas = 0
+    for plant_id in set(estado["plantas"]) - set(hashes):
+        caminho = os.path.join(pasta_site, PASTA_PAGINAS, f"{plant_id}.html")
+        if os.path.exists(caminho): os.remove(caminho)
+        removidas += 1
+        print(f"[INFO] Removida: {PASTA_PAGINAS}/{plant_id}.html")
+
+    # Grid e indice de busca cobrem o catalogo todo; sao baratos e so regravam se o conteudo mudar
+    url_indice = ativos_site.texto("busca.json", indice_busca_json(catalogo))
+    inicial = pagina_inicial(catalogo, chrome, fontes_card, url_indice)
+    caminho_inicial = os.path.join(pasta_site, "index.html")
+    anterior = None
+    if os.path.exists(caminho_inicial):
+        with open(caminho_inicial, encoding="utf-8") as f:
+            anterior = f.read()
+    if forcar or inicial != anterior:
+        gravar_texto(caminho_inicial, inicial)
+        print("[OK] index.html")
+
+    orfaos = ativos_site.limpar_orfaos(estado["ativos"])
+    novo_estado = {"versao": VERSAO_EXPORT, "plantas": hashes, "ativos": sorted(ativos_site.usados)}
+    gravar_texto(os.path.join(pasta_site, ARQUIVO_ESTADO), json.dumps(novo_estado, indent=2) + "\n")
+    print(f"\n[SUCESSO] {len(catalogo)} plantas: {geradas} paginas geradas, {len(catalogo) - geradas} inalteradas, "
+          f"{removidas} removidas; {ativos_site.copiados} ativos novos, {orfaos} obsoletos removidos ({pasta_site}/).")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta o catalogo publico (grid + monografias) como site estatico.")
+    parser.add_argument("--saida", default=PASTA_SITE, help="Pasta de destino (padrao: site/).")
+    parser.add_argument("--forcar", action="store_true", help="Regrava todas as paginas, mesmo as inalteradas.")
+    args = parser.parse_args()
+    sys.exit(exportar(args.saida, forcar=args.forcar))
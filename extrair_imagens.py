@@ -1,6 +1,15 @@
 import fitz  # PyMuPDF
 import os
+import re
 import sys
+import argparse
+from io import BytesIO
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
+
+import otimizar
+from busca import tokenizar
+from catalogo import ARQUIVO_PLANTAS, carregar_catalogo
 
 # --- CORREÇÃO DE CODIFICAÇÃO PARA WINDOWS ---
 if sys.platform == "win32":
@@ -9,39 +18,171 @@ if sys.platform == "win32":
     except AttributeError:
         pass
 
-# Configuração das páginas exatas das plantas no seu PDF
-PAGINAS_PLANTAS = {
-    "tribulus": 8,
-    "maca": 13,
-    "ashwagandha": 18,
-    "mucuna": 24,
-    "longjack": 29,
-    "serenoa": 34,
-    "ajuga": 39,
-    "prunus": 43,
-    "urtica": 48,
-    "feno": 53,
-    "tetradium": 58,
-    "cyanotis": 63,
-    "kaempferia": 67,
-    "bulbine": 72
-}
+PDF_PADRAO = "livro pm desempenho fisico 2025.pdf"
+
+# Uma figura embutida precisa ocupar ao menos esta fracao da pagina para ser "a" ilustracao
+AREA_MINIMA_FIGURA = 0.08
+# Resolucao do recorte renderizado quando nao ha raster embutido (equivale ao antigo Matrix(2, 2))
+ZOOM_RECORTE = 2
 
 def criar_requirements():
     """Cria o arquivo requirements.txt necessário para o Streamlit Cloud"""
-    conteudo = """streamlit
+    conteudo = """streamlit>=1.37
 Pillow"""
     with open("requirements.txt", "w") as f:
         f.write(conteudo)
     print("[INFO] Arquivo 'requirements.txt' criado com sucesso (Item 2).")
 
-def extrair():
-    pdf_nome = "livro pm desempenho fisico 2025.pdf"
-    
+# --- DESCOBERTA DAS PÁGINAS ---
+def tokens(texto):
+    """Tokens sem acento/caixa; inclui pares adjacentes colados ("Long Jack" -> "longjack")."""
+    partes = tokenizar(texto)
+    return set(partes) | {a + b for a, b in zip(partes, partes[1:])}
+
+def slug(texto):
+    partes = tokenizar(texto)
+    return partes[0] if partes else ""
+
+def titulo_da_pagina(page):
+    """Linha com a maior fonte da pagina (titulo da monografia)."""
+    maior, titulo = 0, ""
+    for bloco in page.get_text("dict").get("blocks", []):
+        for linha in bloco.get("lines", []):
+            texto = "".join(s["text"] for s in linha["spans"]).strip()
+            tamanho = max((s["size"] for s in linha["spans"]), default=0)
+            if texto and tamanho > maior:
+                maior, titulo = tamanho, texto
+    return titulo
+
+# Entradas do sumario que nao sao monografias (primeira palavra do titulo, sem acento/caixa)
+TITULOS_IGNORADOS = re.compile(r"introducao|prefacio|apresentacao|sumario|indice|referencias|bibliografia"
+                               r"|glossario|agradecimentos|anexos?|apendices?|conclusao|conclusoes|capitulo|parte")
+
+def entradas_sumario(doc):
+    """[(nivel, titulo, pagina 0-based)] do sumario (outline) do PDF."""
+    return [(nivel, titulo, pagina - 1) for nivel, titulo, pagina in doc.get_toc(simple=True) if pagina >= 1]
+
+def chave_nome(texto):
+    """'Saw Palmetto' -> 'sawpalmetto' (para comparar nomes com tokens())."""
+    return "".join(tokenizar(texto))
+
+def id_do_titulo(titulo):
+    """Id como no catalogo: genero do nome cientifico se o titulo traz um ("Saw Palmetto (Serenoa repens)" -> "serenoa"); senao a primeira palavra."""
+    m = re.search(r"\(\s*([A-Z][a-z]+)\s+[a-z]", titulo)
+    return slug(m.group(1) if m else titulo)
+
+def descobrir_paginas(doc, ids=None, conhecidas=()):
+    """id -> indice da pagina (0-based), a partir do sumario (outline) do PDF.
+
+    Com `ids`, procura cada id nos titulos do sumario e, na falta, no titulo de cada pagina.
+    Sem `ids`, cada entrada de ultimo nivel do sumario vira uma planta (ver id_do_titulo), exceto
+    capitulos/introducao/referencias e titulos que ja correspondem a uma das plantas `conhecidas`.
+    """
+    toc = entradas_sumario(doc)
+    if not ids:
+        chaves = set()
+        for planta in conhecidas:
+            binomio = " ".join(planta.nome_cientifico.split()[:2])
+            chaves.update(c for c in (planta.id, chave_nome(planta.nome), chave_nome(binomio)) if c)
+        paginas = {}
+        for k, (nivel, titulo, pagina) in enumerate(toc):
+            if k + 1 < len(toc) and toc[k + 1][0] > nivel: continue  # tem subentradas: e capitulo
+            if TITULOS_IGNORADOS.fullmatch(slug(titulo)): continue
+            id_planta = id_do_titulo(titulo)
+            if not id_planta or id_planta in paginas: continue
+            if (tokens(titulo) | {chave_nome(titulo)}) & chaves: continue
+            paginas[id_planta] = pagina
+        return paginas
+    toc = [(titulo, pagina) for _, titulo, pagina in toc]
+
+    paginas = {}
+    for id_planta in ids:
+        pagina = next((p for titulo, p in toc if id_planta in tokens(titulo)), None)
+        if pagina is not None:
+            paginas[id_planta] = pagina
+    faltando = [i for i in ids if i not in paginas]
+    if faltando:
+        for num in range(len(doc)):
+            achados = tokens(titulo_da_pagina(doc.load_page(num)))
+            for id_planta in [i for i in faltando if i in achados]:
+                paginas[id_planta] = num
+                faltando.remove(id_planta)
+            if not faltando: break
+    return paginas
+
+def ids_conhecidos():
+    """Ids do catalogo (inclusive os acrescentados por extrair_textos.py --novas): sao os que o app espera.
+
+    Sem catalogo, usa as plantas que ja tem imagem/manifesto.
+    """
+    if os.path.exists(ARQUIVO_PLANTAS):
+        return sorted(p.id for p in carregar_catalogo(ARQUIVO_PLANTAS))
+    ids = set(otimizar.carregar_manifesto()["plantas"])
+    if os.path.isdir(otimizar.PASTA_ORIGEM):
+        ids |= set(otimizar.listar_origens())
+    return sorted(ids)
+
+# --- EXTRAÇÃO (roda nos processos do pool) ---
+_doc = None
+
+def _abrir_pdf(pdf_nome):
+    global _doc
+    _doc = fitz.open(pdf_nome)
+
+def extrair_figura(page):
+    """Devolve (PIL.Image RGB, modo). Prefere o raster embutido; senao renderiza so a caixa da figura."""
+    area_pagina = page.rect.width * page.rect.height
+    melhor = None
+    for info in page.get_images(full=True):
+        xref = info[0]
+        for rect in page.get_image_rects(xref):
+            area = rect.width * rect.height
+            if melhor is None or area > melhor[0]:
+                melhor = (area, xref, rect)
+
+    if melhor and melhor[0] >= AREA_MINIMA_FIGURA * area_pagina:
+        area, xref, rect = melhor
+        base = page.parent.extract_image(xref)
+        # Rasters com mascara (smask) ou espacos de cor exoticos: recorte renderizado e mais fiel
+        if base and not base.get("smask"):
+            try:
+                img = Image.open(BytesIO(base["image"]))
+                img.load()
+                return img.convert("RGB"), "embutida"
+            except Exception:
+                pass  # JPX/JBIG2/CMYK que o PIL nao decodifica: cai no recorte renderizado
+        clip = rect
+    elif melhor:
+        clip = melhor[2]
+    else:
+        # Figura vetorial: uniao dos desenhos da pagina
+        clip = None
+        for desenho in page.get_drawings():
+            clip = desenho["rect"] if clip is None else clip | desenho["rect"]
+        if clip is None or clip.width * clip.height < AREA_MINIMA_FIGURA * area_pagina:
+            clip = page.rect
+
+    pix = page.get_pixmap(matrix=fitz.Matrix(ZOOM_RECORTE, ZOOM_RECORTE), clip=clip & page.rect, alpha=False)
+    img = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+    return img, "recorte"
+
+def processar_lote(lote):
+    """Extrai e otimiza (JPG mestre + derivados) um lote de (id, pagina) em um unico passo."""
+    resultados, erros = [], []
+    for id_planta, pagina_num in lote:
+        try:
+            img, modo = extrair_figura(_doc.load_page(pagina_num))
+            entrada, registro = otimizar.processar_imagem(img, id_planta)
+            resultados.append((id_planta, entrada, registro, modo, pagina_num))
+        except Exception as e:
+            erros.append((id_planta, pagina_num, str(e)))
+    return resultados, erros
+
+def extrair(pdf_nome=PDF_PADRAO, workers=None):
     if not os.path.exists(pdf_nome):
         print("[ERRO] Nao encontrei o arquivo PDF na pasta.")
         print(f"Certifique-se que o arquivo se chama: {pdf_nome}")
-        return
+        return 1
 
     # Cria a pasta para as imagens
     if not os.path.exists("imagens_plantas"):
@@ -51,34 +192,52 @@ def extrair():
     try:
         print("[INFO] Lendo PDF... (Isso pode levar alguns segundos)")
         doc = fitz.open(pdf_nome)
-        
-        for planta_id, pagina_num in PAGINAS_PLANTAS.items():
-            try:
-                if pagina_num < len(doc):
-                    page = doc.load_page(pagina_num)
-                    # Matrix=2 garante alta qualidade na imagem
-                    pix = page.get_pixmap(matrix=fitz.Matrix(2, 2))
-                    
-                    caminho_saida = f"imagens_plantas/{planta_id}.png"
-                    pix.save(caminho_saida)
-                    print(f"[OK] Imagem salva: {caminho_saida}")
-                else:
-                    print(f"[AVISO] Pagina {pagina_num} nao existe no PDF.")
-            except Exception as e:
-                print(f"[ERRO] Falha ao salvar {planta_id}: {e}")
-                
-        print("\n[SUCESSO] Todas as imagens foram extraidas (Item 5)!")
-        
+        paginas = descobrir_paginas(doc, ids_conhecidos())
+        total_paginas = len(doc)
+        doc.close()
     except Exception as e:
         print(f"[ERRO CRITICO] ao abrir o PDF: {e}")
+        return 1
+
+    if not paginas:
+        print("[ERRO] Nenhuma monografia encontrada no sumario do PDF.")
+        return 1
+    for id_planta, pagina_num in sorted(paginas.items(), key=lambda x: x[1]):
+        print(f"[INFO] {id_planta}: pagina {pagina_num}")
+
+    # Divide as paginas entre os processos (cada um abre o PDF uma vez)
+    itens = sorted(paginas.items(), key=lambda x: x[1])
+    n = workers or os.cpu_count() or 1
+    lotes = [itens[i::n] for i in range(n) if itens[i::n]]
+
+    resultados, falhas = [], 0
+    with ProcessPoolExecutor(max_workers=len(lotes), initializer=_abrir_pdf, initargs=(pdf_nome,)) as pool:
+        for ok, erros in pool.map(processar_lote, lotes):
+            for id_planta, entrada, registro, modo, pagina_num in ok:
+                resultados.append((id_planta, entrada, registro))
+                print(f"[OK] {id_planta} (pagina {pagina_num}, {modo}): {registro['origem']} +{len(registro['saidas'])} derivados")
+            for id_planta, pagina_num, erro in erros:
+                falhas += 1
+                print(f"[ERRO] Falha ao extrair {id_planta} (pagina {pagina_num}): {erro}")
+
+    otimizar.gravar_resultados(resultados)
+
+    print(f"\n[SUCESSO] {len(resultados)} de {len(paginas)} figuras extraidas ({total_paginas} paginas no PDF).")
+    return 1 if falhas else 0
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrai as figuras das monografias do PDF direto para JPG/WebP otimizados.")
+    parser.add_argument("pdf", nargs="?", default=PDF_PADRAO)
+    parser.add_argument("--jobs", type=int, default=None, help="Numero de processos (padrao: CPUs disponiveis).")
+    args = parser.parse_args()
+
     # 1. Gera o requirements.txt
     criar_requirements()
-    
+
     # 2. Extrai as imagens
-    extrair()
-    
+    codigo = extrair(args.pdf, workers=args.jobs)
+
     print("\n--- PRONTO ---")
     print("Agora voce ja tem o 'requirements.txt' e a pasta 'imagens_plantas'.")
-    print("Pode remover o PDF e subir para o GitHub.")
\ No newline at end of file
+    print("Pode remover o PDF e subir para o GitHub.")
+    sys.exit(codigo)
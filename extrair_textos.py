@@ -0,0 +1,321 @@
+import fitz  # PyMuPDF
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import ativos
+from busca import normalizar
+from catalogo import ARQUIVO_PLANTAS, CAMPOS, Catalogo, Planta, carregar_catalogo, salvar_catalogo
+from extrair_imagens import PDF_PADRAO, descobrir_paginas, entradas_sumario, slug
+
+# --- CORREÇÃO DE CODIFICAÇÃO PARA WINDOWS ---
+if sys.platform == "win32":
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except AttributeError:
+        pass
+
+# Cache das linhas extraidas de cada pagina, indexado pelo hash do conteudo da pagina.
+# Mesmo PDF (sha256 igual): nada e aberto nem reprocessado. Nova edicao: so as paginas cujo
+# conteudo mudou passam de novo pelo PyMuPDF.
+ARQUIVO_CACHE = os.path.join("dados", "cache_textos.json")
+VERSAO_EXTRACAO = 1        # muda o formato das linhas => invalida o cache inteiro
+MAX_PAGINAS_MONOGRAFIA = 4
+
+# Titulos de secao reconhecidos (texto normalizado: minusculas, sem acento)
+SECOES = (
+    ("nome_cientifico", r"nome cientifico|especie"),
+    ("categoria", r"categoria|classificacao"),
+    ("descricao", r"descricao|visao geral|sobre a planta"),
+    ("mecanismo", r"mecanismos?(?: de acao)?"),
+    ("dose", r"dose(?: usual)?|doses|dosagem(?: usual)?|posologia"),
+    ("interacoes", r"interac(?:ao|oes)(?: medicamentosas)?"),
+    ("adversos", r"(?:efeitos|reacoes|eventos) adversos|efeitos colaterais"),
+    ("contraindicacoes", r"contra-?indicac(?:ao|oes)"),
+    ("nivel_evidencia", r"(?:nivel de )?evidencia(?: cientifica)?"),
+)
+_SECOES = [(campo, re.compile(rf"^[^a-z0-9]*(?:{padrao})\s*(:|$)")) for campo, padrao in SECOES]
+
+# Texto livre de evidencia -> vocabulario usado no catalogo (ordem importa: "muito baixo" antes de "baixo")
+NIVEIS_EVIDENCIA = (
+    ("Muito Baixo", r"muito baix|muito limitad|insuficiente"),
+    # "Risco" so em frases de risco alto; "evidencia alta, baixo risco" continua Alto
+    ("Risco", r"alto risco|risco (alto|elevado|significativo)|insegur|nao segur"),
+    ("Alto", r"\balt[oa]\b|robust|fort[ea]"),
+    ("Moderado", r"moderad|medi[oa]"),
+    ("Baixo", r"baix[oa]|fraca|limitad|preliminar"),
+)
+
+FLAG_ITALICO = 2
+FLAG_NEGRITO = 16
+
+# --- EXTRAÇÃO POR PÁGINA (roda nos processos do pool) ---
+_doc = None
+
+def _abrir_pdf(pdf_nome):
+    global _doc
+    _doc = fitz.open(pdf_nome)
+
+def hash_pagina(page):
+    """Hash do stream de conteudo da pagina: muda quando texto/layout muda, nao com metadados do PDF."""
+    h = hashlib.sha256(f"{VERSAO_EXTRACAO}:{page.rect}".encode())
+    h.update(page.read_contents())
+    return h.hexdigest()[:24]
+
+def linhas_da_pagina(page):
+    """[[texto, tamanho, negrito, italico, resto]] por linha; `resto` = texto depois do primeiro span."""
+    linhas = []
+    for bloco in page.get_text("dict").get("blocks", []):
+        for linha in bloco.get("lines", []):
+            spans = [s for s in linha["spans"] if s["text"].strip()]
+            if not spans: continue
+            texto = " ".join("".join(s["text"] for s in spans).split())
+            tamanho = round(max(s["size"] for s in spans), 1)
+            negrito = bool(spans[0]["flags"] & FLAG_NEGRITO)
+            italico = all(s["flags"] & FLAG_ITALICO for s in spans)
+            resto = " ".join("".join(s["text"] for s in spans[1:]).split())
+            linhas.append([texto, tamanho, negrito, italico, resto])
+    return linhas
+
+def processar_lote(lote):
+    resultados, erros = [], []
+    for num in lote:
+        try:
+            resultados.append((num, linhas_da_pagina(_doc.load_page(num))))
+        except Exception as e:
+            erros.append((num, str(e)))
+    return resultados, erros
+
+# --- MONTAGEM DA MONOGRAFIA ---
+def limpar_titulo(texto):
+    """'12. Tribulus' / 'SAW PALMETTO (SERENOA REPENS)' -> 'Saw Palmetto (Serenoa repens)'."""
+    texto = re.sub(r"^[\d\s.\-–)]+", "", texto).strip()
+    if not texto.isupper(): return texto
+    # Binomio entre parenteses: so o genero com maiuscula
+    return re.sub(r"\(([^)]*)\)", lambda m: f"({m.group(1).capitalize()})", texto.title())
+
+def juntar(partes):
+    """Une as linhas de uma secao desfazendo hifenizacao de fim de linha."""
+    texto = ""
+    for parte in partes:
+        if texto.endswith("-") and parte[:1].islower():
+            texto = texto[:-1] + parte
+        else:
+            texto = f"{texto} {parte}" if texto else parte
+    return texto.strip()
+
+def normalizar_evidencia(texto):
+    norm = normalizar(texto)
+    return next((nivel for nivel, padrao in NIVEIS_EVIDENCIA if re.search(padrao, norm)), texto)
+
+def secao_da_linha(texto, negrito, resto):
+    """(campo, conteudo na mesma linha) se a linha abre uma secao; None caso contrario."""
+    norm = normalizar(texto)
+    for campo, padrao in _SECOES:
+        m = padrao.match(norm)
+        if not m: continue
+        if m.group(1) == ":":
+            return campo, texto.split(":", 1)[1].strip()
+        # Sem dois-pontos so vale como titulo se estiver em destaque (negrito ou linha so com o titulo)
+        if negrito or not resto:
+            return campo, ""
+    return None
+
+def montar_monografia(linhas):
+    """Campos da planta a partir das linhas (ja em ordem de leitura) das paginas da monografia."""
+    if not linhas: return {}
+    tamanhos = sorted(l[1] for l in linhas)
+    corpo = tamanhos[len(tamanhos) // 2]
+    maior = max(tamanhos)
+    campos, atual = {}, None
+    for texto, tamanho, negrito, italico, resto in linhas:
+        # Cabecalho/rodape corrido e numero de pagina
+        if tamanho < 0.8 * corpo or re.fullmatch(r"\d{1,4}", texto): continue
+        if tamanho >= maior and "nome" not in campos:
+            campos["nome"] = [limpar_titulo(texto)]
+            atual = None
+            continue
+        secao = secao_da_linha(texto, negrito, resto)
+        if secao:
+            atual, conteudo = secao
+            campos.setdefault(atual, [])
+            if conteudo: campos[atual].append(conteudo)
+            continue
+        if atual is None:
+            # Antes do titulo: cabecalho corrido/capitulo. Entre titulo e primeira secao:
+            # nome cientifico em italico e, depois, o texto de abertura
+            if "nome" not in campos: continue
+            if italico and "nome_cientifico" not in campos:
+                campos["nome_cientifico"] = [texto]
+            else:
+                campos.setdefault("descricao", []).append(texto)
+            continue
+        campos[atual].append(texto)
+
+    resultado = {campo: juntar(partes) for campo, partes in campos.items() if juntar(partes)}
+    if "nivel_evidencia" in resultado:
+        resultado["nivel_evidencia"] = normalizar_evidencia(resultado["nivel_evidencia"])
+    return resultado
+
+def intervalos(inicios, fronteiras, total_paginas):
+    """id -> [primeira, ultima) paginas, ate a proxima entrada do sumario (limitado a MAX_PAGINAS_MONOGRAFIA)."""
+    fronteiras = sorted(set(fronteiras) | {total_paginas})
+    resultado = {}
+    for id_planta, inicio in inicios.items():
+        fim = next((f for f in fronteiras if f > inicio), total_paginas)
+        resultado[id_planta] = [inicio, min(fim, inicio + MAX_PAGINAS_MONOGRAFIA)]
+    return resultado
+
+# --- CACHE ---
+def carregar_cache():
+    try:
+        with open(ARQUIVO_CACHE, encoding="utf-8") as f:
+            cache = json.load(f)
+        if cache.get("versao") == VERSAO_EXTRACAO: return cache
+    except (OSError, ValueError): pass
+    return {"versao": VERSAO_EXTRACAO, "pdf_sha256": None, "monografias": {}, "hashes": {}, "paginas": {}}
+
+def salvar_cache(cache):
+    tmp = ARQUIVO_CACHE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, ARQUIVO_CACHE)
+
+# --- CATÁLOGO ---
+def binomio(nome_cientifico):
+    """'Serenoa repens (W. Bartram) Small' -> 'serenoa repens'."""
+    return " ".join(normalizar(nome_cientifico).split()[:2])
+
+def mesclar(atual, extraidas):
+    """Sobrepoe os campos extraidos as plantas existentes (campos nao encontrados e o nome ja catalogado ficam como estao)."""
+    dados = {p.id: p.para_dict() for p in atual} if atual else {}
+    por_binomio = {binomio(d["nome_cientifico"]): i for i, d in dados.items() if binomio(d["nome_cientifico"])}
+    novas, alteradas = [], []
+    for id_planta, campos in extraidas.items():
+        if id_planta not in dados:
+            # Entrada nova do sumario: mesma especie de uma planta conhecida atualiza essa;
+            # senao o id segue o catalogo (genero do nome cientifico), se estiver livre
+            chave = binomio(campos.get("nome_cientifico", ""))
+            genero = slug(chave)
+            if chave in por_binomio:
+                id_planta = por_binomio[chave]
+            elif genero and genero not in dados and genero not in extraidas:
+                id_planta = genero
+        registro = dados.get(id_planta)
+        if registro is None:
+            registro = dados[id_planta] = {campo: "" for campo in CAMPOS}
+            registro["id"] = id_planta
+            novas.append(id_planta)
+        antes = dict(registro)
+        # O nome de uma planta ja catalogada e editado a mao: o titulo do PDF nao o substitui
+        fixos = {"id", "nome"} if registro["nome"] else {"id"}
+        registro.update({campo: valor for campo, valor in campos.items() if campo in CAMPOS and campo not in fixos})
+        if registro != antes and id_planta not in novas: alteradas.append(id_planta)
+    return Catalogo([Planta.de_dict(d) for d in dados.values()]), novas, alteradas
+
+def fonte_atual(caminho):
+    try:
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f).get("fonte")
+    except (OSError, ValueError): return None
+
+# --- PIPELINE ---
+def extrair(pdf_nome=PDF_PADRAO, workers=None, saida=ARQUIVO_PLANTAS, novas=False, dry_run=False):
+    if not os.path.exists(pdf_nome):
+        print(f"[ERRO] Nao encontrei o arquivo PDF: {pdf_nome}")
+        return 1
+
+    atual = carregar_catalogo(saida) if os.path.exists(saida) else None
+    cache = carregar_cache()
+    pdf_sha256 = ativos.hash_arquivo(pdf_nome)
+    ids = [p.id for p in atual] if atual else []
+
+    if cache["pdf_sha256"] == pdf_sha256 and cache["monografias"] and not novas:
+        # Mesmo PDF: paginas, limites e linhas saem todos do cache
+        print("[INFO] PDF inalterado: usando o cache de extracao.")
+        monografias, hashes, pendentes = cache["monografias"], cache["hashes"], []
+    else:
+        print("[INFO] Lendo PDF... (Isso pode levar alguns segundos)")
+        try:
+            doc = fitz.open(pdf_nome)
+            inicios = descobrir_paginas(doc, ids) if ids else {}
+            if novas or not ids:
+                extras = descobrir_paginas(doc, conhecidas=atual or ())
+                inicios.update({i: p for i, p in extras.items() if i not in inicios})
+            # Qualquer entrada do sumario (capitulos, referencias...) encerra a monografia anterior
+            monografias = intervalos(inicios, [p for _, _, p in entradas_sumario(doc)], len(doc))
+            # Hash barato (so o stream de conteudo) de cada pagina que interessa
+            hashes = {}
+            for inicio, fim in monografias.values():
+                for num in range(inicio, fim):
+                    hashes[str(num)] = hash_pagina(doc.load_page(num))
+            doc.close()
+        except Exception as e:
+            print(f"[ERRO CRITICO] ao abrir o PDF: {e}")
+            return 1
+        pendentes = sorted({int(num) for num, h in hashes.items() if h not in cache["paginas"]})
+
+    if not monografias:
+        print("[ERRO] Nenhuma monografia encontrada no sumario do PDF.")
+        return 1
+
+    falhas = 0
+    if pendentes:
+        print(f"[INFO] {len(pendentes)} paginas novas/alteradas de {len(hashes)} (demais vem do cache).")
+        n = min(workers or os.cpu_count() or 1, len(pendentes))
+        lotes = [pendentes[i::n] for i in range(n)]
+        with ProcessPoolExecutor(max_workers=n, initializer=_abrir_pdf, initargs=(pdf_nome,)) as pool:
+            for ok, erros in pool.map(processar_lote, lotes):
+                for num, linhas in ok:
+                    cache["paginas"][hashes[str(num)]] = linhas
+                for num, erro in erros:
+                    falhas += 1
+                    print(f"[ERRO] Falha ao ler a pagina {num}: {erro}")
+
+    # Guarda so as paginas ainda referenciadas
+    vivos = set(hashes.values())
+    cache.update({
+        "pdf_sha256": pdf_sha256 if not falhas else None,
+        "monografias": monografias,
+        "hashes": hashes,
+        "paginas": {h: l for h, l in cache["paginas"].items() if h in vivos},
+    })
+    if not dry_run:
+        salvar_cache(cache)
+
+    extraidas = {}
+    for id_planta, (inicio, fim) in sorted(monografias.items(), key=lambda x: x[1][0]):
+        linhas = []
+        for num in range(inicio, fim):
+            linhas += cache["paginas"].get(hashes.get(str(num)), [])
+        campos = montar_monografia(linhas)
+        if not campos:
+            print(f"[AVISO] {id_planta} (paginas {inicio}-{fim - 1}): nenhum texto reconhecido.")
+            continue
+        extraidas[id_planta] = campos
+        faltando = [c for c in CAMPOS[1:] if c not in campos]
+        print(f"[OK] {id_planta} (paginas {inicio}-{fim - 1}): {len(campos)} campos"
+              + (f" (sem: {', '.join(faltando)})" if faltando else ""))
+
+    catalogo_novo, ids_novos, ids_alterados = mesclar(atual, extraidas)
+    print(f"\n[INFO] {len(extraidas)} monografias lidas: {len(ids_novos)} novas, {len(ids_alterados)} alteradas.")
+    if dry_run:
+        print("[INFO] --dry-run: nada gravado em", saida)
+    else:
+        salvar_catalogo(catalogo_novo, saida, fonte=fonte_atual(saida) or os.path.splitext(os.path.basename(pdf_nome))[0])
+        print(f"[SUCESSO] Catalogo gravado em {saida} ({len(catalogo_novo)} plantas).")
+    return 1 if falhas else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrai o texto das monografias do PDF para dados/plantas.json (incremental por pagina).")
+    parser.add_argument("pdf", nargs="?", default=PDF_PADRAO)
+    parser.add_argument("--jobs", type=int, default=None, help="Numero de processos (padrao: CPUs disponiveis).")
+    parser.add_argument("--saida", default=ARQUIVO_PLANTAS, help="Catalogo a atualizar (padrao: dados/plantas.json).")
+    parser.add_argument("--novas", action="store_true", help="Inclui entradas do sumario que ainda nao estao no catalogo.")
+    parser.add_argument("--dry-run", action="store_true", help="Mostra o que seria extraido sem gravar o catalogo.")
+    args = parser.parse_args()
+    sys.exit(extrair(args.pdf, workers=args.jobs, saida=args.saida, novas=args.novas, dry_run=args.dry_run))
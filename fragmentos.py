@@ -0,0 +1,243 @@
+import html
+import hashlib
+from types import SimpleNamespace
+
+from catalogo import CAMPOS
+
+# --- FUNÇÕES DE LAYOUT (BLINDADAS CONTRA ERRO DE INDENTAÇÃO) ---
+# Recebem a planta ja escapada (ver escapar_planta); nunca interpolam texto cru.
+def render_details_html(plant):
+    # Usamos concatenação (...) para evitar qualquer erro de identação do Python
+    html = (
+        f'<div class="detail-card">'
+        f'<h1 style="text-align: left; font-size: 3rem !important; color: #1a472a; margin-bottom: 0;">{plant.nome}</h1>'
+        f'<h3 style="font-style: italic; color: #666 !important; margin-top: -5px; margin-bottom: 20px;">{plant.nome_cientifico}</h3>'
+
+        f'<div style="background-color: rgba(26, 71, 42, 0.05); border-left: 4px solid #1a472a; padding: 15px; border-radius: 4px; margin-bottom: 25px; font-size: 1rem; color: #2c3e50;">'
+        f'{plant.descricao}'
+        f'</div>'
+
+        f'<h3 style="color: #2d5a3f; margin-bottom: 10px;">⚙️ Mecanismo</h3>'
+        f'<p style="color: #2c3e50; line-height: 1.6;">{plant.mecanismo}</p>'
+
+        f'<div style="margin-top: 20px; padding: 15px; background-color: #e8f5e9; border-radius: 8px; border: 1px solid #c8e6c9;">'
+        f'<h3 style="margin: 0 0 10px 0; color: #1b5e20;">💊 Dosagem Usual</h3>'
+        f'<p style="margin: 0; font-weight: bold; color: #1b5e20; font-size: 1.1rem;">{plant.dose}</p>'
+        f'</div>'
+
+        f'<hr style="margin: 30px 0; border-top: 1px solid #ddd;">'
+
+        f'<h3 style="color: #8B0000 !important; margin-bottom: 20px;">⚠️ Perfil de Segurança</h3>'
+
+        f'<div style="display: grid; grid-template-columns: 1fr 1fr; gap: 20px;">'
+        f'<div>'
+        f'<strong>Efeitos Adversos:</strong>'
+        f'<p style="font-size: 0.95rem; color: #444;">{plant.adversos}</p>'
+        f'</div>'
+        f'<div>'
+        f'<strong>Contraindicações:</strong>'
+        f'<p style="font-size: 0.95rem; color: #b71c1c;">{plant.contraindicacoes}</p>'
+        f'</div>'
+        f'</div>'
+
+        f'<div style="margin-top: 20px;">'
+        f'<strong>Interações:</strong>'
+        f'<p style="font-size: 0.95rem; color: #444; font-style: italic;">{plant.interacoes}</p>'
+        f'</div>'
+        f'</div>'
+    )
+    return html
+
+def render_card_html(plant, img_html, bg_badge, color_badge):
+    html = (
+        f'<div class="plant-card-v2 animate-enter">'
+        f'<div class="card-img-wrapper">{img_html}</div>'
+        f'<div class="card-body">'
+        f'<div class="card-title-v2">{plant.nome}</div>'
+        f'<span class="card-scientific">{plant.nome_cientifico}</span>'
+        f'<span class="badge-pill" style="background-color: {bg_badge}; color: {color_badge};">'
+        f'{plant.nivel_evidencia}'
+        f'</span>'
+        f'</div>'
+        f'</div>'
+    )
+    return html
+
+def render_foto_html(plant, img_html):
+    if img_html:
+        return (
+            f'<div class="taped-photo">'
+            f'{img_html}'
+            f'<div style="text-align:center; font-family:\'Courier New\'; font-size:0.8em; margin-top:5px; color:#555;">Fig. 1: {plant.nome}</div>'
+            f'</div>'
+        )
+    return (
+        '<div class="taped-photo" style="height:300px; display:flex; align-items:center; justify-content:center; background:#f9f9f9; color:#ccc;">'
+        '<span>Imagem não carregada</span>'
+        '</div>'
+    )
+
+def texto_evidencia(nivel):
+    if nivel == 'Alto': return 'Nível Alto: Estudos Clínicos Robustos'
+    if 'Risco' in nivel: return 'Atenção: Risco Elevado'
+    return f'Nível: {nivel}'
+
+def render_resumo_html(plant):
+    return (
+        f'<div class="detail-card">'
+        f'<h3 style="margin-top:0;">🏷️ Categoria</h3><p>{plant.categoria}</p>'
+        f'<hr style="margin: 15px 0;">'
+        f'<h3>🧪 Evidência</h3><p>{texto_evidencia(plant.nivel_evidencia)}</p>'
+        f'</div>'
+    )
+
+CORES_ALERTA = {"alto": ("#b71c1c", "#fdecea"), "moderado": ("#8a5a00", "#fff4e0"), "info": ("#1a472a", "#e8f5e9")}
+ROTULO_NIVEL = {"alto": "⛔ Alto", "moderado": "⚠️ Moderado", "info": "ℹ️ Informativo"}
+
+def render_alertas_html(alertas):
+    """Lista de alertas da triagem (interacoes.MatrizInteracoes.triagem); textos escapados aqui."""
+    itens = []
+    for alerta in alertas:
+        cor, fundo = CORES_ALERTA[alerta["nivel"]]
+        itens.append(
+            f'<div style="border-left: 4px solid {cor}; background-color: {fundo}; padding: 12px 15px; border-radius: 4px; margin-bottom: 10px;">'
+            f'<strong style="color: {cor};">{ROTULO_NIVEL[alerta["nivel"]]}</strong> · '
+            f'<strong>{html.escape(alerta["motivo"])}</strong>'
+            f'<p style="margin: 5px 0 0 0; font-size: 0.9rem; color: #444; font-style: italic;">{html.escape(alerta["texto"])}</p>'
+            f'</div>'
+        )
+    return f'<div class="detail-card">{"".join(itens)}</div>'
+
+def html_img(fontes, classe="", estilo="", lazy=False):
+    """<img> a partir de [(url, densidade)]; a primeira fonte vira o src (o navegador a usa como 1x)."""
+    srcset = f' srcset="{", ".join(f"{u} {d}x" for u, d in fontes[1:])}"' if len(fontes) > 1 else ""
+    attr_classe = f' class="{classe}"' if classe else ""
+    attr_estilo = f' style="{estilo}"' if estilo else ""
+    attr_lazy = ' loading="lazy" decoding="async"' if lazy else ""
+    return f'<img src="{fontes[0][0]}"{srcset}{attr_classe}{attr_estilo}{attr_lazy}>'
+
+CABECALHO_HOME_HTML = """
+<div class="header-overlay animate-enter">
+<h1 style="color: #1a472a; font-size: 4rem;">HERBARIO DIGITAL</h1>
+<p style="font-size: 1.2rem; color: #1a472a; font-style: italic; margin-top: -10px;">
+Guia de Plantas Medicinais e Desempenho Físico
+</p>
+<div style="width: 100px; height: 3px; background: #1a472a; margin: 20px auto;"></div>
+</div>
+"""
+
+# --- CSS GLOBAL (app e site estatico) ---
+FONTES_GOOGLE = "@import url('https://fonts.googleapis.com/css2?family=Cinzel:wght@400;700&family=Fauna+One&display=swap');"
+
+def css_html(bg_url, fontes_css=FONTES_GOOGLE):
+    css_background = f"""
+    .stApp {{
+        background-image: url("{bg_url}");
+        background-size: cover;
+        background-position: center;
+        background-attachment: fixed;
+    }}
+""" if bg_url else """ .stApp { background-color: #F7F5EB; } """
+    return f"""
+    <style>
+    {fontes_css}
+    {css_background}
+    .block-container {{ padding-top: 2rem; padding-bottom: 5rem; }}
+    .header-overlay {{ background-color: rgba(255, 255, 255, 0.95); padding: 30px; border-radius: 15px; box-shadow: 0 4px 20px rgba(0,0,0,0.15); backdrop-filter: blur(5px); margin-bottom: 30px; text-align: center; border: 1px solid rgba(255,255,255,0.5); }}
+    h1 {{ font-family: 'Cinzel', serif !important; color: #1a472a !important; font-size: 3.5rem !important; margin-bottom: 5px !important; text-shadow: none !important; }}
+    h2, h3 {{ font-family: 'Cinzel', serif !important; color: #2d5a3f !important; }}
+    p, li, span, div, a {{ font-family: 'Fauna One', serif; color: #2c3e50; }}
+    section[data-testid="stSidebar"] {{ background-color: rgba(255, 253, 245, 0.96); border-right: 1px solid #dcdcdc; }}
+    .sidebar-logo {{ display: block; margin: 0 auto 20px auto; width: 90%; transition: transform 0.2s; }}
+    .sidebar-logo:hover {{ transform: scale(1.05); cursor: pointer; }}
+    .plant-card-v2 {{ background-color: rgba(255, 255, 255, 0.95); border: 1px solid #dcdcdc; border-radius: 8px 25px 8px 25px; padding: 0; box-shadow: 2px 2px 10px rgba(0,0,0,0.05); transition: transform 0.2s ease; height: 100%; overflow: hidden; }}
+    .plant-card-v2:hover {{ transform: translateY(-5px); box-shadow: 0 8px 20px rgba(27, 77, 62, 0.2); border-color: #4CAF50; }}
+    .card-img-wrapper {{ height: 180px; overflow: hidden; border-bottom: 3px solid #1a472a; background-color: #f4f4f4; }}
+    .card-img-v2 {{ width: 100%; height: 100%; object-fit: cover; }}
+    .card-body {{ padding: 15px; text-align: center; }}
+    .badge-pill {{ display: inline-block; padding: 6px 14px; border-radius: 50px; font-size: 0.75rem; font-weight: bold; text-transform: uppercase; letter-spacing: 1px; color: #FFFFFF !important; background-color: #2e7d32 !important; box-shadow: 0 2px 4px rgba(0,0,0,0.2); }}
+    div.stButton > button {{ background-color: #1a472a !important; color: #FFFFFF !important; border-radius: 30px; border: 2px solid #1a472a; padding: 8px 20px; font-family: 'Cinzel', serif; font-weight: bold; transition: all 0.2s; width: 100%; }}
+    div.stButton > button:hover {{ background-color: #2d5a3f !important; color: #FFFFFF !important; border-color: #2d5a3f; transform: scale(1.02); }}
+    div.stButton > button p {{ color: #FFFFFF !important; }}
+    .detail-card {{ background-color: rgba(255, 255, 255, 0.95); padding: 40px; border-radius: 15px; box-shadow: 0 8px 32px rgba(0, 0, 0, 0.1); backdrop-filter: blur(8px); border: 1px solid rgba(255, 255, 255, 0.5); margin-bottom: 20px; height: 100%; color: #2c3e50; }}
+    .taped-photo {{ background: white; padding: 10px 10px 40px 10px; box-shadow: 2px 2px 10px rgba(0,0,0,0.2); transform: rotate(-1.5deg); margin-bottom: 20px; border: 1px solid #ddd; }}
+    #MainMenu {{visibility: hidden;}} footer {{visibility: hidden;}}
+    </style>
+"""
+
+MARCADOR_IMAGEM = "\x00IMG\x00"
+CARD_SEM_IMAGEM = '<div style="height:100%; background:#f0f4f1; display:flex; align-items:center; justify-content:center; color:#8ba896;">🌿</div>'
+
+# --- CACHE DE FRAGMENTOS ---
+def escapar_planta(planta):
+    """Copia da planta com todos os campos ja escapados para HTML (feito uma vez, na montagem do cache)."""
+    return SimpleNamespace(**{campo: html.escape(getattr(planta, campo)) for campo in CAMPOS})
+
+def versao_templates():
+    """Hash do codigo deste modulo: editar um template invalida os fragmentos automaticamente."""
+    with open(__file__, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+VERSAO_TEMPLATES = versao_templates()
+
+class CacheFragmentos:
+    """HTML pronto por planta, montado na primeira vez que cada fragmento e pedido.
+
+    Deve viver em um cache por processo cuja chave inclua a versao dos dados e dos ativos.
+    `fontes_card`/`fontes_detalhe` sao funcoes plant_id -> [(ref, densidade)] (lista vazia = sem imagem),
+    chamadas uma unica vez por planta. Uma ref `str` e a URL final; qualquer outra passa por
+    `resolver(ref)` -> URL (ou None) a cada pedido.
+    """
+
+    def __init__(self, catalogo, fontes_card, fontes_detalhe, resolver=None):
+        self.catalogo = catalogo
+        self.fontes_card = fontes_card
+        self.fontes_detalhe = fontes_detalhe
+        self.resolver = resolver
+        self.versao = VERSAO_TEMPLATES
+        self._escapadas = {}
+        self._fontes = {}      # (slot, plant_id) -> [(ref, densidade)]
+        self._imgs = {}        # (slot, plant_id, lazy) -> <img> pronto (so quando todas as refs sao URLs)
+        self._cards = {}       # plant_id -> (html antes da imagem, html depois da imagem)
+        self._detalhes = {}
+
+    def _escapada(self, plant_id):
+        if plant_id not in self._escapadas:
+            self._escapadas[plant_id] = escapar_planta(self.catalogo.get(plant_id))
+        return self._escapadas[plant_id]
+
+    def _img(self, slot, plant_id, lazy=False):
+        chave = (slot, plant_id, lazy)
+        if chave in self._imgs: return self._imgs[chave]
+        if (slot, plant_id) not in self._fontes:
+            produzir = self.fontes_card if slot == "card" else self.fontes_detalhe
+            self._fontes[(slot, plant_id)] = produzir(plant_id)
+        fontes = self._fontes[(slot, plant_id)]
+        fixas = all(isinstance(ref, str) for ref, _ in fontes)
+        if not fixas:
+            # Modo base64: o data URI vem do cache LRU limitado a cada pedido, em vez de ficar
+            # duplicado (e sem limite) dentro do HTML guardado aqui. So o src: um srcset de
+            # data URIs mandaria todas as densidades no markdown
+            fontes = [(url, d) for url, d in ((self.resolver(ref) if not isinstance(ref, str) else ref, d) for ref, d in fontes[:1]) if url]
+        if slot == "card":
+            img = html_img(fontes, classe="card-img-v2", lazy=lazy) if fontes else None
+        else:
+            img = html_img(fontes, estilo="width: 100%;") if fontes else None
+        if fixas: self._imgs[chave] = img
+        return img
+
+    # `lazy` depende da posicao no grid (a primeira linha carrega ja), por isso vem de quem monta o grid.
+    def card(self, plant_id, lazy=True):
+        if plant_id not in self._cards:
+            html_card = render_card_html(self._escapada(plant_id), MARCADOR_IMAGEM, "#2D6A4F", "#FFFFFF")
+            self._cards[plant_id] = tuple(html_card.split(MARCADOR_IMAGEM, 1))
+        antes, depois = self._cards[plant_id]
+        return antes + (self._img("card", plant_id, lazy) or CARD_SEM_IMAGEM) + depois
+
+    def detalhe(self, plant_id):
+        """(foto + resumo da coluna esquerda, monografia da coluna direita)."""
+        if plant_id not in self._detalhes:
+            planta = self._escapada(plant_id)
+            self._detalhes[plant_id] = (render_resumo_html(planta), render_details_html(planta))
+        resumo, monografia = self._detalhes[plant_id]
+        return render_foto_html(self._escapada(plant_id), self._img("detalhe", plant_id)) + resumo, monografia
@@ -0,0 +1,192 @@
+import re
+
+from busca import normalizar
+
+# Vocabulario controlado de classes de farmacos: (tag, rotulo, padroes no texto de `interacoes`,
+# padroes que indicam que a PROPRIA planta tem esse efeito, buscados em categoria/mecanismo/descricao).
+# Os padroes rodam sobre o texto normalizado (minusculas, sem acento).
+CLASSES_FARMACOS = (
+    ("imao", "IMAOs", (r"\bimaos?\b", r"inibidores? da mao"), ()),
+    ("sedativos", "Sedativos / depressores do SNC", (r"sedativ", r"benzodiazep", r"hipnotic"), (r"\bgaba", r"sedativ")),
+    ("diureticos", "Diuréticos", (r"diuretic",), (r"diuretic",)),
+    ("hipotensores", "Hipotensores / anti-hipertensivos", (r"hipotens", r"anti-?hipertens"), (r"vasodilat", r"\bpde5\b", r"hipotens")),
+    ("betabloqueadores", "Betabloqueadores (propranolol)", (r"propranolol", r"betabloq"), ()),
+    ("insulina", "Insulina / hipoglicemiantes", (r"insulin", r"hipoglicem", r"antidiabet"), (r"hipoglicem",)),
+    ("cyp", "Substratos de CYP450", (r"\bcyp", r"enzimas hepaticas"), ()),
+    ("anticoagulantes", "Anticoagulantes / antiagregantes", (r"sangramento", r"anticoag", r"antiagreg", r"varfarina"), (r"anticoag", r"antiagreg")),
+    ("hormonios", "Terapia hormonal (TRH, esteroides)", (r"(?<!exames )hormona", r"\btrh\b"), (r"testosterona", r"\blh\b", r"dhea", r"hormonal")),
+    ("anabolizantes", "Esteroides anabolizantes", (r"anabolizant",), (r"anabolic", r"ecdister")),
+    ("renais", "Fármacos de eliminação renal", (r"\brena(l|is)\b",), ()),
+    ("exames_hormonais", "Exames laboratoriais hormonais", (r"exames? hormona",), ()),
+)
+
+# Condicoes do paciente reconhecidas em `contraindicacoes`: (tag, rotulo, padroes, tags implicadas)
+CONDICOES = (
+    ("gravidez", "Gravidez", (r"gravid", r"gestac", r"gestant"), ()),
+    ("idade_fertil", "Mulheres em idade fértil", (r"idade fertil",), ()),
+    ("criancas", "Crianças", (r"crianc", r"pediatr"), ()),
+    ("autoimune", "Doença autoimune", (r"autoimun",), ()),
+    ("cancer_hormonal", "Câncer hormônio-dependente", (r"cancer hormonio",), ()),
+    ("cancer_prostata", "Câncer de próstata", (r"cancer de prostata",), ("cancer_hormonal",)),
+    ("hpb", "Hiperplasia prostática (HPB)", (r"\bhpb\b", r"hiperplasia prostatica"), ()),
+    ("esquizofrenia", "Esquizofrenia / psicose", (r"esquizofren", r"psicos"), ()),
+    ("insuficiencia_renal", "Insuficiência renal", (r"insuficiencia renal",), ()),
+    ("insuficiencia_cardiaca", "Insuficiência cardíaca", (r"insuficiencia (renal/)?cardiac",), ()),
+    ("hipersensibilidade", "Hipersensibilidade à planta", (r"hipersensib", r"alergi"), ()),
+)
+
+# Contraindicacao sem condicao ("Nao recomendado.") e interacoes nunca estudadas
+PADROES_RESTRITA = (r"^nao recomendad", r"^contraindicad")
+PADROES_SEM_DADOS = (r"desconhecid", r"sem dados", r"nao estudad")
+
+INDICE_CLASSE = {tag: i for i, (tag, _, _, _) in enumerate(CLASSES_FARMACOS)}
+INDICE_CONDICAO = {tag: i for i, (tag, _, _, _) in enumerate(CONDICOES)}
+ROTULO_CLASSE = {tag: rotulo for tag, rotulo, _, _ in CLASSES_FARMACOS}
+ROTULO_CONDICAO = {tag: rotulo for tag, rotulo, _, _ in CONDICOES}
+
+def _compilar(padroes):
+    return re.compile("|".join(f"(?:{p})" for p in padroes)) if padroes else None
+
+_CLASSES = [(_compilar(interage), _compilar(atua)) for _, _, interage, atua in CLASSES_FARMACOS]
+_CONDICOES = [_compilar(padroes) for _, _, padroes, _ in CONDICOES]
+_RESTRITA = _compilar(PADROES_RESTRITA)
+_SEM_DADOS = _compilar(PADROES_SEM_DADOS)
+
+def bits(mascara):
+    """Indices dos bits ligados, do menor para o maior."""
+    while mascara:
+        menor = mascara & -mascara
+        yield menor.bit_length() - 1
+        mascara ^= menor
+
+def mascara_de(tags, indice):
+    mascara = 0
+    for tag in tags:
+        mascara |= 1 << indice[tag]
+    return mascara
+
+def mascara_condicoes(tags):
+    """Como mascara_de, incluindo as condicoes implicadas (cancer de prostata => hormonio-dependente)."""
+    tags = set(tags)
+    for tag, _, _, implicadas in CONDICOES:
+        if tag in tags: tags.update(implicadas)
+    return mascara_de(tags, INDICE_CONDICAO)
+
+# --- TAGS POR PLANTA ---
+class PerfilInteracoes:
+    """Tags normalizadas de uma planta, como bitsets sobre CLASSES_FARMACOS/CONDICOES."""
+    __slots__ = ("interage", "atua", "contraindica", "restrita", "sem_dados")
+
+    def __init__(self, planta):
+        interacoes = normalizar(planta.interacoes)
+        efeitos = normalizar(f"{planta.categoria} {planta.mecanismo} {planta.descricao}")
+        contraindicacoes = normalizar(planta.contraindicacoes).strip()
+        self.interage = self.atua = self.contraindica = 0
+        for i, (interage, atua) in enumerate(_CLASSES):
+            if interage is not None and interage.search(interacoes): self.interage |= 1 << i
+            if atua is not None and atua.search(efeitos): self.atua |= 1 << i
+        for i, padrao in enumerate(_CONDICOES):
+            if padrao.search(contraindicacoes): self.contraindica |= 1 << i
+        self.restrita = bool(_RESTRITA.search(contraindicacoes))
+        self.sem_dados = bool(_SEM_DADOS.search(interacoes))
+
+    def tags(self):
+        return {
+            "interage": [CLASSES_FARMACOS[i][0] for i in bits(self.interage)],
+            "atua": [CLASSES_FARMACOS[i][0] for i in bits(self.atua)],
+            "contraindica": [CONDICOES[i][0] for i in bits(self.contraindica)],
+            "restrita": self.restrita,
+            "sem_dados": self.sem_dados,
+        }
+
+# --- MATRIZ DE PARES ---
+class MatrizInteracoes:
+    """Perfis de todas as plantas e matriz simetrica de pares em conflito, montadas uma vez por catalogo.
+
+    Par (a, b) em conflito: a interage com uma classe de farmaco cujo efeito b tambem tem (ou vice-versa).
+    `conflitos[i]` e um bitset sobre as plantas; a triagem de k plantas custa O(k) operacoes de bits.
+    """
+
+    def __init__(self, plantas):
+        self.plantas = tuple(plantas)
+        self.posicao = {p.id: i for i, p in enumerate(self.plantas)}
+        self.perfis = [PerfilInteracoes(p) for p in self.plantas]
+
+        # Por classe: bitset das plantas que interagem com ela / que tem o mesmo efeito
+        self.interagem = [0] * len(CLASSES_FARMACOS)
+        self.atuam = [0] * len(CLASSES_FARMACOS)
+        listas_interagem = [[] for _ in CLASSES_FARMACOS]
+        listas_atuam = [[] for _ in CLASSES_FARMACOS]
+        for i, perfil in enumerate(self.perfis):
+            for c in bits(perfil.interage): listas_interagem[c].append(i)
+            for c in bits(perfil.atua): listas_atuam[c].append(i)
+        for c in range(len(CLASSES_FARMACOS)):
+            for i in listas_interagem[c]: self.interagem[c] |= 1 << i
+            for i in listas_atuam[c]: self.atuam[c] |= 1 << i
+
+        self.conflitos = [0] * len(self.plantas)
+        for c in range(len(CLASSES_FARMACOS)):
+            if not self.interagem[c] or not self.atuam[c]: continue
+            for i in listas_interagem[c]: self.conflitos[i] |= self.atuam[c]
+            for j in listas_atuam[c]: self.conflitos[j] |= self.interagem[c]
+        for i in range(len(self.plantas)):
+            self.conflitos[i] &= ~(1 << i)
+
+    def perfil(self, plant_id):
+        i = self.posicao.get(plant_id)
+        return self.perfis[i] if i is not None else None
+
+    def em_conflito(self, id_a, id_b):
+        return bool(self.conflitos[self.posicao[id_a]] >> self.posicao[id_b] & 1)
+
+    def motivos_par(self, i, j):
+        """Classes que explicam o conflito entre as plantas i e j: [(planta que interage, planta com o efeito, tag)]."""
+        motivos = []
+        for a, b in ((i, j), (j, i)):
+            for c in bits(self.perfis[a].interage & self.perfis[b].atua):
+                motivos.append((self.plantas[a], self.plantas[b], CLASSES_FARMACOS[c][0]))
+        return motivos
+
+    def triagem(self, ids, classes=(), condicoes=()):
+        """Alertas para as plantas escolhidas, as classes de farmacos em uso e as condicoes do paciente.
+
+        Cada alerta e um dict {"nivel": "alto"|"moderado"|"info", "tipo", "plantas": [ids], "motivo", "texto"}.
+        """
+        indices = [self.posicao[i] for i in dict.fromkeys(ids) if i in self.posicao]
+        selecao = 0
+        for i in indices: selecao |= 1 << i
+        mascara_classes = mascara_de(classes, INDICE_CLASSE)
+        mascara_cond = mascara_condicoes(condicoes)
+        alertas = []
+
+        for i in indices:
+            planta, perfil = self.plantas[i], self.perfis[i]
+            if perfil.restrita:
+                alertas.append({"nivel": "alto", "tipo": "restrita", "plantas": [planta.id],
+                                "motivo": f"{planta.nome}: uso não recomendado", "texto": planta.contraindicacoes})
+            for c in bits(perfil.contraindica & mascara_cond):
+                alertas.append({"nivel": "alto", "tipo": "contraindicacao", "plantas": [planta.id],
+                                "motivo": f"{planta.nome} × {CONDICOES[c][1]}", "texto": planta.contraindicacoes})
+            for c in bits(perfil.interage & mascara_classes):
+                nivel = "alto" if "contraindicad" in normalizar(planta.interacoes) else "moderado"
+                alertas.append({"nivel": nivel, "tipo": "farmaco", "plantas": [planta.id],
+                                "motivo": f"{planta.nome} × {CLASSES_FARMACOS[c][1]}", "texto": planta.interacoes})
+            # Classes em uso que a planta potencializa por ter o mesmo efeito (ex.: vasodilatador + hipotensor)
+            for c in bits(perfil.atua & mascara_classes & ~perfil.interage):
+                alertas.append({"nivel": "info", "tipo": "efeito_aditivo", "plantas": [planta.id],
+                                "motivo": f"{planta.nome} × {CLASSES_FARMACOS[c][1]} (efeito somado)", "texto": planta.mecanismo})
+            if perfil.sem_dados and (len(indices) > 1 or mascara_classes):
+                alertas.append({"nivel": "info", "tipo": "sem_dados", "plantas": [planta.id],
+                                "motivo": f"{planta.nome}: interações não estudadas", "texto": planta.interacoes})
+
+        for i in indices:
+            # Cada par uma vez: so os vizinhos de indice maior dentro da selecao
+            for j in bits(self.conflitos[i] & selecao & ~((1 << (i + 1)) - 1)):
+                for a, b, tag in self.motivos_par(i, j):
+                    alertas.append({"nivel": "moderado", "tipo": "par", "plantas": [a.id, b.id],
+                                    "motivo": f"{a.nome} × {b.nome}: {ROTULO_CLASSE[tag]}",
+                                    "texto": f"{a.nome}: {a.interacoes} {b.nome}: {b.mecanismo}"})
+
+        ordem = {"alto": 0, "moderado": 1, "info": 2}
+        alertas.sort(key=lambda a: ordem[a["nivel"]])
+        return alertas
@@ -0,0 +1,162 @@
+import os
+import json
+import time
+import threading
+import functools
+
+# Instrumentacao opcional dos caminhos quentes do app.
+# Desligada (padrao), todas as funcoes publicas viram no-ops e os decoradores devolvem a funcao original.
+HABILITADO = os.environ.get("FITO_METRICAS", "").lower() in ("1", "true", "sim", "on")
+ARQUIVO_JSONL = os.environ.get("FITO_METRICAS_JSONL")      # uma linha JSON por rerun
+ARQUIVO_PROM = os.environ.get("FITO_METRICAS_PROM")        # dump no formato textfile do Prometheus
+INTERVALO_DUMP = 10.0                                      # segundos entre dumps do arquivo .prom
+JANELA_SESSAO_ATIVA = 300.0                                # sessao sem rerun ha 5 min deixa de contar
+
+PREFIXO = "fito_"
+LIMITES_HISTOGRAMA = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_lock = threading.Lock()
+_contadores = {}     # (nome, labels) -> valor
+_histogramas = {}    # nome -> [contagem, soma, [contagem por limite]]
+_sessoes = {}        # session_id -> ultimo rerun (time.time)
+_local = threading.local()
+_ultimo_dump = [0.0]
+
+def _chave(nome, labels):
+    return nome, tuple(sorted(labels.items()))
+
+# --- REGISTRO ---
+def contar(nome, valor=1, **labels):
+    if not HABILITADO: return
+    chave = _chave(nome, labels)
+    with _lock:
+        _contadores[chave] = _contadores.get(chave, 0) + valor
+
+def observar(nome, segundos):
+    if not HABILITADO: return
+    with _lock:
+        hist = _histogramas.get(nome)
+        if hist is None:
+            hist = _histogramas[nome] = [0, 0.0, [0] * len(LIMITES_HISTOGRAMA)]
+        hist[0] += 1
+        hist[1] += segundos
+        for i, limite in enumerate(LIMITES_HISTOGRAMA):
+            if segundos <= limite: hist[2][i] += 1
+
+class _Nulo:
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+_NULO = _Nulo()
+
+class _Cronometro:
+    __slots__ = ("nome", "inicio")
+
+    def __init__(self, nome):
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observar(self.nome, time.perf_counter() - self.inicio)
+        return False
+
+def medir(nome):
+    """`with medir("busca"):` registra a duracao no histograma `nome`."""
+    return _Cronometro(nome) if HABILITADO else _NULO
+
+def instrumentar(nome):
+    """Decorador equivalente a `medir`; sem instrumentacao devolve a funcao intacta."""
+    def decorador(func):
+        if not HABILITADO: return func
+        @functools.wraps(func)
+        def envolvida(*args, **kwargs):
+            with _Cronometro(nome):
+                return func(*args, **kwargs)
+        return envolvida
+    return decorador
+
+# --- RERUNS, BYTES E SESSÕES ---
+def instalar_contador_mensagens(ctx):
+    """Envolve o envio de ForwardMsg da sessao (uma vez por ScriptRunContext) para somar ao rerun
+    corrente os bytes de tudo o que vai ao navegador: markdown, botoes, widgets, json... (protobuf, sem compressao).
+
+    Devolve False se o contexto nao expoe o envio (versao do Streamlit sem `_enqueue`).
+    """
+    if not HABILITADO or ctx is None: return False
+    original = getattr(ctx, "_enqueue", None)
+    if original is None: return False
+    if getattr(original, "_fito_contador", False): return True
+    def enqueue(msg):
+        _local.bytes = getattr(_local, "bytes", 0) + msg.ByteSize()
+        return original(msg)
+    enqueue._fito_contador = True
+    ctx._enqueue = enqueue
+    return True
+
+def inicio_rerun():
+    # Guarda o acumulado de bytes da thread: reruns aninhados (app > painel) medem cada um o seu delta
+    if not HABILITADO: return None
+    return time.perf_counter(), getattr(_local, "bytes", 0)
+
+def fim_rerun(inicio, session_id=None, escopo="app", view=None):
+    if not HABILITADO or inicio is None: return
+    t0, bytes0 = inicio
+    duracao = time.perf_counter() - t0
+    emitidos = getattr(_local, "bytes", 0) - bytes0
+    observar(f"rerun_{escopo}_segundos", duracao)
+    contar("rerun_bytes_total", emitidos, escopo=escopo)
+    contar("rerun_total", escopo=escopo)
+    agora = time.time()
+    with _lock:
+        if session_id: _sessoes[session_id] = agora
+    if ARQUIVO_JSONL:
+        linha = {"ts": round(agora, 3), "sessao": session_id, "escopo": escopo, "view": view,
+                 "segundos": round(duracao, 6), "bytes": emitidos}
+        with _lock, open(ARQUIVO_JSONL, "a", encoding="utf-8") as f:
+            f.write(json.dumps(linha) + "\n")
+    if ARQUIVO_PROM and agora - _ultimo_dump[0] >= INTERVALO_DUMP:
+        _ultimo_dump[0] = agora
+        tmp = ARQUIVO_PROM + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(texto_prometheus())
+        os.replace(tmp, ARQUIVO_PROM)
+
+def sessoes_ativas():
+    limite = time.time() - JANELA_SESSAO_ATIVA
+    with _lock:
+        for sid in [s for s, t in _sessoes.items() if t < limite]:
+            del _sessoes[sid]
+        return len(_sessoes)
+
+# --- EXPORTAÇÃO ---
+def _labels(labels):
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}" if labels else ""
+
+def instantaneo():
+    """Copia consistente das metricas (para o painel de debug / JSON)."""
+    with _lock:
+        contadores = [{"nome": n, "labels": dict(l), "valor": v} for (n, l), v in sorted(_contadores.items())]
+        histogramas = {n: {"contagem": h[0], "soma": h[1], "media": h[1] / h[0] if h[0] else 0.0}
+                       for n, h in sorted(_histogramas.items())}
+    return {"habilitado": HABILITADO, "sessoes_ativas": sessoes_ativas(), "contadores": contadores, "histogramas": histogramas}
+
+def texto_prometheus():
+    linhas = [f"# TYPE {PREFIXO}sessoes_ativas gauge", f"{PREFIXO}sessoes_ativas {sessoes_ativas()}"]
+    with _lock:
+        tipos_vistos = set()
+        for (nome, labels), valor in sorted(_contadores.items()):
+            if nome not in tipos_vistos:
+                tipos_vistos.add(nome)
+                linhas.append(f"# TYPE {PREFIXO}{nome} counter")
+            linhas.append(f"{PREFIXO}{nome}{_labels(labels)} {valor}")
+        for nome, (contagem, soma, buckets) in sorted(_histogramas.items()):
+            linhas.append(f"# TYPE {PREFIXO}{nome} histogram")
+            for limite, acumulado in zip(LIMITES_HISTOGRAMA, buckets):
+                linhas.append(f'{PREFIXO}{nome}_bucket{{le="{limite}"}} {acumulado}')
+            linhas.append(f'{PREFIXO}{nome}_bucket{{le="+Inf"}} {contagem}')
+            linhas.append(f"{PREFIXO}{nome}_sum {soma:.6f}")
+            linhas.append(f"{PREFIXO}{nome}_count {contagem}")
+    return "\n".join(linhas) + "\n"
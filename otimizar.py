@@ -1,6 +1,15 @@
 import os
 import sys
-from PIL import Image
+import re
+import json
+import hashlib
+import argparse
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageEnhance
+
+import ativos
+import pacote
 
 # Forcar encoding UTF-8 para evitar erros no Windows
 if sys.platform == "win32":
@@ -9,43 +18,351 @@ if sys.platform == "win32":
     except AttributeError:
         pass
 
-def otimizar_imagens():
-    pasta_origem = "imagens_plantas"
-    
+PASTA_ORIGEM = "imagens_plantas"
+PASTA_DERIVADOS = os.path.join(PASTA_ORIGEM, "derivados")
+ARQUIVO_MANIFESTO = os.path.join(PASTA_DERIVADOS, "manifest.json")
+
+# Tamanhos nomeados (caixa maxima largura x altura) usados pelo app.
+# "card" cobre o .card-img-v2 (180px de altura, ~300px de largura no grid de 4 colunas);
+# "detalhe" e "detalhe2x" alimentam o srcset da .taped-photo (1x e telas retina).
+VARIANTES = {
+    "card": (360, 540),
+    "detalhe": (480, 720),
+    "detalhe2x": (960, 1440),
+}
+
+# Formato -> (extensao, parametros do PIL)
+FORMATOS = {
+    "webp": ("webp", {"format": "WEBP", "quality": 70, "method": 6}),
+    "jpeg": ("jpg", {"format": "JPEG", "quality": 75, "optimize": True, "progressive": True}),
+}
+
+# JPG mestre mantido em imagens_plantas/ (substitui o PNG extraido do PDF)
+MESTRE = {"caixa": (800, 1200), "quality": 75}
+
+def hash_parametros():
+    """Qualquer mudanca em VARIANTES/FORMATOS/MESTRE invalida todos os derivados."""
+    params = {"variantes": VARIANTES, "formatos": FORMATOS, "mestre": MESTRE}
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+
+def gerar_derivados(img, nome_sem_ext):
+    """Gera todas as variantes/formatos de uma planta e devolve a entrada do manifesto."""
+    entrada = {}
+    for variante, caixa in VARIANTES.items():
+        copia = img.copy()
+        copia.thumbnail(caixa)
+        formatos = {}
+        for formato, (ext, params) in FORMATOS.items():
+            arquivo = f"{nome_sem_ext}-{variante}.{ext}"
+            caminho = os.path.join(PASTA_DERIVADOS, arquivo)
+            copia.save(caminho, **params)
+            formatos[formato] = {
+                "arquivo": arquivo,
+                "largura": copia.width,
+                "altura": copia.height,
+                "bytes": os.path.getsize(caminho),
+            }
+        entrada[variante] = formatos
+    return entrada
+
+def processar_imagem(img, nome_sem_ext, reaproveitar_mestre=False):
+    """Gera derivados e JPG mestre de uma imagem RGB ja carregada. Devolve (entrada do app, registro de build)."""
+    novo_caminho = os.path.join(PASTA_ORIGEM, f"{nome_sem_ext}.jpg")
+    os.makedirs(PASTA_DERIVADOS, exist_ok=True)
+
+    # Derivados a partir da resolucao original
+    entrada = gerar_derivados(img, nome_sem_ext)
+
+    # JPG Otimizado (mestre)
+    if not reaproveitar_mestre:
+        mestre = img.copy()
+        mestre.thumbnail(MESTRE["caixa"])
+        mestre.save(novo_caminho, "JPEG", quality=MESTRE["quality"], optimize=True)
+
+    saidas = {
+        formatos[f]["arquivo"]: ativos.hash_arquivo(os.path.join(PASTA_DERIVADOS, formatos[f]["arquivo"]))
+        for formatos in entrada.values() for f in formatos
+    }
+    registro = {
+        "origem": os.path.basename(novo_caminho),
+        "hash_origem": ativos.hash_arquivo(novo_caminho),
+        "parametros": hash_parametros(),
+        "saidas": saidas,
+    }
+    return entrada, registro
+
+def processar_origem(caminho_completo):
+    """Executado nos processos do pool. Devolve (id, entrada do app, registro de build)."""
+    arquivo = os.path.basename(caminho_completo)
+    nome_sem_ext = os.path.splitext(arquivo)[0]
+    novo_caminho = os.path.join(PASTA_ORIGEM, f"{nome_sem_ext}.jpg")
+
+    with Image.open(caminho_completo) as img:
+        img = img.convert('RGB')
+        # Nao recomprime um mestre que ja esta no tamanho
+        ja_mestre = caminho_completo == novo_caminho and img.width <= MESTRE["caixa"][0] and img.height <= MESTRE["caixa"][1]
+        entrada, registro = processar_imagem(img, nome_sem_ext, reaproveitar_mestre=ja_mestre)
+
+    # Remove o arquivo pesado original (PNG)
+    if caminho_completo != novo_caminho:
+        os.remove(caminho_completo)
+
+    return nome_sem_ext, entrada, registro
+
+def carregar_manifesto():
+    if not os.path.exists(ARQUIVO_MANIFESTO):
+        return {"plantas": {}, "build": {}}
+    try:
+        with open(ARQUIVO_MANIFESTO, encoding="utf-8") as f:
+            manifesto = json.load(f)
+    except Exception:
+        return {"plantas": {}, "build": {}}
+    manifesto.setdefault("plantas", {})
+    manifesto.setdefault("build", {})
+    return manifesto
+
+def salvar_manifesto(plantas, build):
+    manifesto = {
+        "versao": 1,
+        "variantes": {nome: {"largura": l, "altura": a} for nome, (l, a) in VARIANTES.items()},
+        "plantas": plantas,
+        "build": build,
+    }
+    tmp = ARQUIVO_MANIFESTO + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, indent=2, sort_keys=True)
+    os.replace(tmp, ARQUIVO_MANIFESTO)
+
+def gravar_resultados(resultados):
+    """Mescla [(id, entrada, registro)] no manifesto e republica os ativos estaticos."""
+    manifesto = carregar_manifesto()
+    for nome_sem_ext, entrada, registro in resultados:
+        manifesto["plantas"][nome_sem_ext] = entrada
+        manifesto["build"][nome_sem_ext] = registro
+    os.makedirs(PASTA_DERIVADOS, exist_ok=True)
+    salvar_manifesto(manifesto["plantas"], manifesto["build"])
+    if resultados:
+        publicar_saidas()
+
+def publicar_saidas():
+    # Versoes com hash em static/ (modo de ativos estaticos) e o pacote mmap lido pelos workers
+    ativos.publicar_tudo()
+    pacote.gerar_pacote_padrao()
+
+def publicacao_desatualizada():
+    """Motivo para republicar static/ e o pacote (None se os dois refletem os arquivos atuais)."""
+    mapa = ativos.carregar_mapa()
+    if not mapa: return f"{ativos.ARQUIVO_MAPA} ausente"
+    try:
+        pac = pacote.Pacote(pacote.ARQUIVO_PACOTE)
+    except (OSError, ValueError, pacote.PacoteInvalido) as e:
+        return f"{pacote.ARQUIVO_PACOTE} ausente ou invalido ({e})"
+    try:
+        caminhos = ativos.listar_ativos()
+        chaves = {pacote.chave_de(c) for c in caminhos}
+        if set(mapa) != chaves: return f"{ativos.ARQUIVO_MAPA} nao lista os arquivos atuais"
+        if set(pac.itens) != chaves: return f"{pacote.ARQUIVO_PACOTE} nao contem os arquivos atuais"
+        for caminho in caminhos:
+            chave = pacote.chave_de(caminho)
+            sha256 = ativos.hash_arquivo(caminho)
+            if pac.sha256(chave) != sha256: return f"{chave} mudou desde o ultimo pacote"
+            arquivo, digest = ativos.arquivo_publicado(chave, sha256)
+            if mapa[chave] != ativos.url_para(arquivo, digest) or not os.path.exists(os.path.join(ativos.PASTA_STATIC, arquivo)):
+                return f"{chave} nao publicado em {ativos.PASTA_STATIC}/"
+    finally:
+        pac.fechar()
+    return None
+
+def listar_origens():
+    """id -> caminho da origem. Um PNG recem-extraido tem prioridade sobre o JPG mestre antigo."""
+    origens = {}
+    for arquivo in sorted(os.listdir(PASTA_ORIGEM)):
+        caminho = os.path.join(PASTA_ORIGEM, arquivo)
+        if not os.path.isfile(caminho) or not arquivo.lower().endswith(('.png', '.jpg', '.jpeg')):
+            continue
+        nome_sem_ext = os.path.splitext(arquivo)[0]
+        if nome_sem_ext not in origens or not arquivo.lower().endswith('.jpg'):
+            origens[nome_sem_ext] = caminho
+    return origens
+
+def motivo_desatualizado(caminho, registro):
+    """None se os derivados de `caminho` estao em dia; senao, o motivo."""
+    if not registro:
+        return "novo"
+    if os.path.basename(caminho) != registro.get("origem"):
+        return "origem substituida"
+    if registro.get("parametros") != hash_parametros():
+        return "parametros alterados"
+    if ativos.hash_arquivo(caminho) != registro.get("hash_origem"):
+        return "origem alterada"
+    for arquivo, digest in registro.get("saidas", {}).items():
+        saida = os.path.join(PASTA_DERIVADOS, arquivo)
+        if not os.path.exists(saida):
+            return f"saida ausente ({arquivo})"
+        if ativos.hash_arquivo(saida) != digest:
+            return f"saida alterada ({arquivo})"
+    return None
+
+def otimizar_imagens(dry_run=False, check=False, forcar=False, workers=None, republicar=False):
+    """Processa apenas as origens novas/alteradas. Retorna o codigo de saida do processo."""
+    pasta_origem = PASTA_ORIGEM
+
     if not os.path.exists(pasta_origem):
         print("[ERRO] Pasta 'imagens_plantas' nao encontrada.")
-        return
+        return 1
 
     print("--- INICIANDO OTIMIZACAO ---")
-    
-    arquivos = os.listdir(pasta_origem)
-    
-    for arquivo in arquivos:
-        if arquivo.lower().endswith(('.png', '.jpg', '.jpeg')):
-            caminho_completo = os.path.join(pasta_origem, arquivo)
-            nome_sem_ext = os.path.splitext(arquivo)[0]
-            
-            try:
-                # 1. Abre a imagem
-                with Image.open(caminho_completo) as img:
-                    img = img.convert('RGB')
-                    img.thumbnail((800, 1200)) 
-                    
-                    # 2. Salva como JPG Otimizado
-                    novo_caminho = os.path.join(pasta_origem, f"{nome_sem_ext}.jpg")
-                    img.save(novo_caminho, "JPEG", quality=75, optimize=True)
-                    
-                    print(f"[OK] Otimizado: {novo_caminho}")
-            
-                # 3. Remove o arquivo pesado original (PNG)
-                if caminho_completo != novo_caminho:
-                    os.remove(caminho_completo)
-                    
-            except Exception as e:
-                print(f"[FALHA] Erro ao processar {arquivo}: {e}")
+
+    manifesto = carregar_manifesto()
+    plantas, build = manifesto["plantas"], manifesto["build"]
+    origens = listar_origens()
+
+    pendentes = {}
+    for nome_sem_ext, caminho in origens.items():
+        motivo = "forcado" if forcar else motivo_desatualizado(caminho, build.get(nome_sem_ext))
+        if motivo:
+            pendentes[nome_sem_ext] = (caminho, motivo)
+    removidos = sorted(set(build) - set(origens))
+
+    print(f"[INFO] {len(origens)} origens, {len(pendentes)} a processar, {len(origens) - len(pendentes)} em dia, {len(removidos)} removidas.")
+    for nome_sem_ext, (caminho, motivo) in sorted(pendentes.items()):
+        print(f"  [PENDENTE] {caminho}: {motivo}")
+    for nome_sem_ext in removidos:
+        print(f"  [REMOVIDA] {nome_sem_ext}: origem nao existe mais")
+
+    if check:
+        # Mesmas condicoes da execucao normal: derivados, static/ativos.json e pacote
+        publicacao = publicacao_desatualizada()
+        if publicacao:
+            print(f"  [PENDENTE] publicacao: {publicacao}")
+        if pendentes or removidos or publicacao:
+            print("\n[ERRO] Derivados ou ativos publicados desatualizados. Rode 'python otimizar.py'.")
+            return 1
+        print("\n[OK] Todos os derivados e ativos publicados estao em dia.")
+        return 0
+
+    if dry_run:
+        print("\n--- DRY-RUN: nenhum arquivo foi alterado ---")
+        return 0
+
+    os.makedirs(PASTA_DERIVADOS, exist_ok=True)
+
+    # Derivados de plantas que sairam do catalogo
+    for nome_sem_ext in removidos:
+        for arquivo in build.pop(nome_sem_ext).get("saidas", {}):
+            caminho = os.path.join(PASTA_DERIVADOS, arquivo)
+            if os.path.exists(caminho): os.remove(caminho)
+        plantas.pop(nome_sem_ext, None)
+
+    falhas = 0
+    if pendentes:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futuros = {nome: pool.submit(processar_origem, caminho) for nome, (caminho, _) in pendentes.items()}
+            for nome, futuro in futuros.items():
+                try:
+                    nome_sem_ext, entrada, registro = futuro.result()
+                    plantas[nome_sem_ext] = entrada
+                    build[nome_sem_ext] = registro
+                    print(f"[OK] Otimizado: {os.path.join(pasta_origem, registro['origem'])} (+{len(registro['saidas'])} derivados)")
+                except Exception as e:
+                    falhas += 1
+                    print(f"[FALHA] Erro ao processar {pendentes[nome][0]}: {e}")
+
+    salvar_manifesto(plantas, build)
 
     print("\n--- CONCLUIDO ---")
     print("Todas as imagens foram convertidas para JPG leve.")
+    print(f"Manifesto de derivados: {ARQUIVO_MANIFESTO}")
+
+    if republicar or pendentes or removidos or publicacao_desatualizada():
+        publicar_saidas()
+
+    return 1 if falhas else 0
+
+# --- FUNDO E FONTES PRÉ-COMPUTADOS (fora do caminho da requisicao) ---
+PASTA_PRECOMPUTADOS = ativos.PASTA_PRECOMPUTADOS
+ARQUIVO_FUNDO = ativos.ARQUIVO_FUNDO
+PASTA_FONTES = ativos.PASTA_FONTES
+ARQUIVO_FONTES_CSS = ativos.ARQUIVO_FONTES_CSS
+ORIGENS_FUNDO = ["fundo.png", "Gemini_Generated_Image_ynyy07ynyy07ynyy.png"]
+# Mesmo tratamento que app.py aplicava em tempo de execucao
+FUNDO = {"brilho": 1.15, "quality": 70}
+
+URL_FONTES = "https://fonts.googleapis.com/css2?family=Cinzel:wght@400;700&family=Fauna+One&display=swap"
+# So o subset "latin" (U+0000-00FF) e necessario para portugues
+SUBSETS_FONTES = ("latin",)
+# Sem um User-Agent moderno o Google Fonts responde com TTF em vez de WOFF2
+USER_AGENT_FONTES = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+
+def preprocessar_fundo(forcar=False):
+    """Gera precomputados/fundo.jpg a partir do PNG de fundo, se ele existir e tiver mudado."""
+    origem = next((f for f in ORIGENS_FUNDO if os.path.exists(f)), None)
+    if origem is None:
+        return False
+    marcador = ARQUIVO_FUNDO + ".origem"
+    digest = f"{ativos.hash_arquivo(origem)}:{json.dumps(FUNDO, sort_keys=True)}"
+    if not forcar and os.path.exists(ARQUIVO_FUNDO) and os.path.exists(marcador):
+        with open(marcador, encoding="utf-8") as f:
+            if f.read().strip() == digest:
+                return False
+    os.makedirs(PASTA_PRECOMPUTADOS, exist_ok=True)
+    with Image.open(origem) as img:
+        img = ImageEnhance.Brightness(img.convert("RGBA")).enhance(FUNDO["brilho"]).convert("RGB")
+        img.save(ARQUIVO_FUNDO, "JPEG", quality=FUNDO["quality"], optimize=True, progressive=True)
+    with open(marcador, "w", encoding="utf-8") as f:
+        f.write(digest)
+    print(f"[OK] Fundo pre-processado: {ARQUIVO_FUNDO}")
+    return True
+
+def baixar(url, cabecalhos=None):
+    requisicao = urllib.request.Request(url, headers=cabecalhos or {})
+    with urllib.request.urlopen(requisicao, timeout=30) as resposta:
+        return resposta.read()
+
+def baixar_fontes(forcar=False):
+    """Baixa os WOFF2 (subset latin) de Cinzel/Fauna One e grava um fontes.css com URLs relativas."""
+    if not forcar and os.path.exists(ARQUIVO_FONTES_CSS):
+        return False
+    css = baixar(URL_FONTES, {"User-Agent": USER_AGENT_FONTES}).decode("utf-8")
+    blocos = re.findall(r"/\*\s*([\w-]+)\s*\*/\s*(@font-face\s*\{[^}]*\})", css)
+    os.makedirs(PASTA_FONTES, exist_ok=True)
+    saida, baixados = [], {}
+    for subset, bloco in blocos:
+        if subset not in SUBSETS_FONTES: continue
+        familia = re.search(r"font-family:\s*'([^']+)'", bloco).group(1)
+        peso = re.search(r"font-weight:\s*(\d+)", bloco).group(1)
+        url = re.search(r"url\((https://[^)]+)\)", bloco).group(1)
+        if url not in baixados:
+            # Fontes variaveis: varios pesos apontam para o mesmo arquivo
+            arquivo = f"{familia.lower().replace(' ', '-')}-{peso}-{subset}.woff2"
+            with open(os.path.join(PASTA_FONTES, arquivo), "wb") as f:
+                f.write(baixar(url))
+            baixados[url] = arquivo
+        saida.append(bloco.replace(url, baixados[url]))
+    if not saida:
+        raise RuntimeError("nenhum @font-face 'latin' encontrado na resposta do Google Fonts")
+    with open(ARQUIVO_FONTES_CSS, "w", encoding="utf-8") as f:
+        f.write("\n".join(saida) + "\n")
+    print(f"[OK] Fontes auto-hospedadas: {', '.join(sorted(set(baixados.values())))}")
+    return True
+
+def precomputar_chrome(forcar=False):
+    """Fundo + fontes. Devolve True se algo mudou; falhas nao sao fatais (o app tem fallback)."""
+    alterado = False
+    for etapa in (preprocessar_fundo, baixar_fontes):
+        try:
+            alterado = etapa(forcar=forcar) or alterado
+        except Exception as e:
+            print(f"[AVISO] {etapa.__name__}: {e}")
+    return alterado
 
 if __name__ == "__main__":
-    otimizar_imagens()
+    parser = argparse.ArgumentParser(description="Gera os derivados otimizados de imagens_plantas/ (incremental).")
+    parser.add_argument("--dry-run", action="store_true", help="Apenas lista o que seria processado.")
+    parser.add_argument("--check", action="store_true", help="Sai com codigo 1 se algum derivado estiver desatualizado (CI).")
+    parser.add_argument("--forcar", action="store_true", help="Reprocessa todas as imagens, ignorando o manifesto.")
+    parser.add_argument("--jobs", type=int, default=None, help="Numero de processos (padrao: CPUs disponiveis).")
+    args = parser.parse_args()
+    # Fundo/fontes antes das imagens, para entrarem na mesma publicacao (static/ + pacote)
+    chrome_alterado = not (args.dry_run or args.check) and precomputar_chrome(forcar=args.forcar)
+    sys.exit(otimizar_imagens(dry_run=args.dry_run, check=args.check, forcar=args.forcar, workers=args.jobs, republicar=chrome_alterado))
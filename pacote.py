@@ -0,0 +1,208 @@
+import os
+import sys
+import json
+import mmap
+import struct
+import hashlib
+import argparse
+import threading
+
+import ativos
+
+# Forcar encoding UTF-8 para evitar erros no Windows
+if sys.platform == "win32":
+    try:
+        sys.stdout.reconfigure(encoding='utf-8')
+    except AttributeError:
+        pass
+
+# Pacote unico com todas as imagens codificadas, mapeado em memoria pelo app.
+# N workers no mesmo host compartilham as mesmas paginas do page cache.
+#
+# Layout:  [cabecalho fixo][indice JSON][dados alinhados em ALINHAMENTO bytes]
+#   cabecalho fixo = MAGICO (8) | tamanho do indice (uint32 LE) | sha256 do indice (32)
+#   indice         = {"versao": 1, "itens": {chave: {"offset", "tamanho", "tipo", "sha256"}}}
+ARQUIVO_PACOTE = os.path.join("imagens_plantas", "ativos.pack")
+MAGICO = b"FITOPAK1"
+CABECALHO = struct.Struct("<8sI32s")
+ALINHAMENTO = 16
+VERSAO = 1
+
+TIPOS = {".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".webp": "image/webp", ".woff2": "font/woff2"}
+
+class PacoteInvalido(Exception):
+    pass
+
+def chave_de(caminho):
+    """Chave do indice = caminho relativo com '/' (o mesmo usado pelo app)."""
+    return os.path.normpath(caminho).replace(os.sep, "/")
+
+def escrever_pacote(caminhos, destino=ARQUIVO_PACOTE):
+    """Concatena os arquivos em `destino` (escrita atomica). Devolve o indice."""
+    itens, blobs = {}, []
+    posicao = 0
+    for caminho in caminhos:
+        with open(caminho, "rb") as f:
+            dados = f.read()
+        enchimento = -posicao % ALINHAMENTO
+        posicao += enchimento
+        itens[chave_de(caminho)] = {
+            "offset": posicao,
+            "tamanho": len(dados),
+            "tipo": TIPOS.get(os.path.splitext(caminho)[1].lower(), "application/octet-stream"),
+            "sha256": hashlib.sha256(dados).hexdigest(),
+        }
+        blobs.append((enchimento, dados))
+        posicao += len(dados)
+
+    # Os offsets dependem do tamanho do proprio indice: repete ate o inicio dos dados estabilizar
+    relativos = {chave: item["offset"] for chave, item in itens.items()}
+    inicio_dados = CABECALHO.size
+    while True:
+        for chave, item in itens.items():
+            item["offset"] = relativos[chave] + inicio_dados
+        indice = json.dumps({"versao": VERSAO, "itens": itens}, sort_keys=True).encode("utf-8")
+        necessario = CABECALHO.size + len(indice)
+        necessario += -necessario % ALINHAMENTO
+        if necessario <= inicio_dados: break
+        inicio_dados = necessario
+    indice += b" " * (inicio_dados - CABECALHO.size - len(indice))
+
+    tmp = destino + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(CABECALHO.pack(MAGICO, len(indice), hashlib.sha256(indice).digest()))
+        f.write(indice)
+        for enchimento, dados in blobs:
+            f.write(b"\0" * enchimento)
+            f.write(dados)
+    os.replace(tmp, destino)
+    return itens
+
+class Pacote:
+    """Leitura via mmap: `obter` devolve memoryview sobre o arquivo, sem copia."""
+
+    def __init__(self, caminho=ARQUIVO_PACOTE):
+        self.caminho = caminho
+        self.fechado = False
+        with open(caminho, "rb") as f:
+            # mmap de arquivo vazio levanta ValueError: trata antes como pacote truncado
+            if os.fstat(f.fileno()).st_size < CABECALHO.size:
+                raise PacoteInvalido(f"{caminho}: arquivo truncado")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        try:
+            self.itens = self._ler_indice()
+        except PacoteInvalido:
+            self.fechar()
+            raise
+        except (ValueError, KeyError, TypeError) as e:
+            # JSON/UTF-8 invalido ou indice sem "itens"
+            self.fechar()
+            raise PacoteInvalido(f"{caminho}: indice ilegivel ({e})") from e
+
+    def _ler_indice(self):
+        magico, tamanho_indice, sha_indice = CABECALHO.unpack_from(self._mmap, 0)
+        if magico != MAGICO:
+            raise PacoteInvalido(f"{self.caminho}: nao e um pacote de ativos")
+        bruto = self._mmap[CABECALHO.size:CABECALHO.size + tamanho_indice]
+        if hashlib.sha256(bruto).digest() != sha_indice:
+            raise PacoteInvalido(f"{self.caminho}: indice corrompido")
+        indice = json.loads(bruto.decode("utf-8"))
+        if indice.get("versao") != VERSAO:
+            raise PacoteInvalido(f"{self.caminho}: versao {indice.get('versao')} nao suportada")
+        return indice["itens"]
+
+    def __contains__(self, chave):
+        return chave in self.itens
+
+    def obter(self, chave):
+        item = self.itens.get(chave)
+        if item is None or self.fechado: return None
+        return self._view[item["offset"]:item["offset"] + item["tamanho"]]
+
+    def tipo(self, chave):
+        item = self.itens.get(chave)
+        return item["tipo"] if item else None
+
+    def sha256(self, chave):
+        item = self.itens.get(chave)
+        return item["sha256"] if item else None
+
+    def verificar(self):
+        """Lista de chaves cujo conteudo nao confere com o sha256 do indice."""
+        ruins = []
+        for chave, item in self.itens.items():
+            fim = item["offset"] + item["tamanho"]
+            if fim > len(self._mmap) or hashlib.sha256(self._view[item["offset"]:fim]).hexdigest() != item["sha256"]:
+                ruins.append(chave)
+        return ruins
+
+    def fechar(self):
+        self.fechado = True
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Fatia ainda em uso em outra thread: o mmap e desfeito quando ela for coletada
+            pass
+
+class PacoteAtual:
+    """Um unico Pacote aberto por processo, reaberto quando o arquivo muda (o anterior e fechado).
+
+    None enquanto o arquivo nao existe ou e invalido.
+    """
+
+    def __init__(self, caminho=ARQUIVO_PACOTE):
+        self.caminho = caminho
+        self.mtime = None
+        self._pacote = None
+        self._lock = threading.Lock()
+
+    def obter(self):
+        try:
+            mtime = os.path.getmtime(self.caminho)
+        except OSError:
+            mtime = None
+        with self._lock:
+            if mtime != self.mtime:
+                anterior = self._pacote
+                try:
+                    self._pacote = Pacote(self.caminho) if mtime is not None else None
+                except (OSError, ValueError, PacoteInvalido):
+                    self._pacote = None
+                self.mtime = mtime
+                if anterior is not None: anterior.fechar()
+            return self._pacote
+
+def gerar_pacote_padrao(destino=ARQUIVO_PACOTE):
+    itens = escrever_pacote(ativos.listar_ativos(), destino)
+    total = sum(i["tamanho"] for i in itens.values())
+    print(f"[OK] Pacote de ativos: {destino} ({len(itens)} itens, {total / 1024:.0f} KB)")
+    return itens
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera, lista ou verifica o pacote de ativos mapeado em memoria.")
+    parser.add_argument("comando", choices=("gerar", "listar", "verificar"))
+    parser.add_argument("arquivo", nargs="?", default=ARQUIVO_PACOTE)
+    args = parser.parse_args()
+
+    if args.comando == "gerar":
+        gerar_pacote_padrao(args.arquivo)
+        sys.exit(0)
+
+    try:
+        pacote = Pacote(args.arquivo)
+    except (OSError, PacoteInvalido) as e:
+        print(f"[ERRO] {e}")
+        sys.exit(1)
+
+    if args.comando == "listar":
+        for chave, item in sorted(pacote.itens.items()):
+            print(f"{item['offset']:>10} {item['tamanho']:>10} {item['tipo']:<12} {item['sha256'][:12]} {chave}")
+        print(f"\n{len(pacote.itens)} itens")
+    else:
+        ruins = pacote.verificar()
+        for chave in ruins:
+            print(f"[FALHA] {chave}: sha256 nao confere")
+        print(f"[{'ERRO' if ruins else 'OK'}] {len(pacote.itens) - len(ruins)} de {len(pacote.itens)} itens integros")
+        sys.exit(1 if ruins else 0)